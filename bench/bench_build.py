@@ -0,0 +1,157 @@
+"""Time each build stage on a synthetic corpus and emit JSON results.
+
+Run from the repository root:
+
+    python3 bench/bench_build.py --pages 500 --output bench.json
+    python3 bench/bench_build.py --pages 500 --compare bench.json
+
+With --compare the run exits non-zero when a stage is slower than the
+baseline by more than --threshold.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from functions import (
+    text_to_textnodes, markdown_to_html_node, scan_blocks, generate_pages_recursive,
+)
+from textnode import BlockType
+from corpus import add_corpus_arguments, generator_from_args
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+def inline_texts(markdown: str) -> list[str]:
+    # the strings markdown_to_html_node hands to text_to_textnodes
+    texts = []
+    for block in scan_blocks(markdown.split("\n")):
+        if block.block_type is BlockType.CODE:
+            continue
+        if block.block_type in (BlockType.ORDERED_LIST, BlockType.UNORDERED_LIST):
+            texts.extend(block.content)
+        else:
+            texts.append(block.content)
+    return texts
+
+def time_stage(func, repeat: int) -> dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"min_s": min(timings), "median_s": statistics.median(timings)}
+
+def run(args: argparse.Namespace) -> dict:
+    generator = generator_from_args(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        paths = generator.write(content)
+        markdowns = []
+        for path in paths:
+            with open(path, "r") as f:
+                markdowns.append(f.read())
+
+        texts = [text for markdown in markdowns for text in inline_texts(markdown)]
+        trees = [markdown_to_html_node(markdown) for markdown in markdowns]
+
+        def inline_stage():
+            for text in texts:
+                text_to_textnodes(text)
+
+        def parse_stage():
+            for markdown in markdowns:
+                markdown_to_html_node(markdown)
+
+        def render_stage():
+            for tree in trees:
+                tree.to_html()
+
+        build_count = 0
+
+        def build_stage():
+            nonlocal build_count
+            build_count += 1
+            dest = os.path.join(tmp, f"docs{build_count}")
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content, TEMPLATE, dest, "/bench", jobs=args.jobs)
+
+        stages = {
+            "text_to_textnodes": time_stage(inline_stage, args.repeat),
+            "markdown_to_html_node": time_stage(parse_stage, args.repeat),
+            "to_html": time_stage(render_stage, args.repeat),
+            "generate_pages_recursive": time_stage(build_stage, args.repeat),
+        }
+
+    for result in stages.values():
+        result["per_page_us"] = result["median_s"] / len(paths) * 1e6
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "corpus": generator.params(),
+        "inline_texts": len(texts),
+        "jobs": args.jobs,
+        "repeat": args.repeat,
+        "stages": stages,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for stage, result in results["stages"].items():
+        if stage not in baseline.get("stages", {}):
+            continue
+        before = baseline["stages"][stage]["median_s"]
+        after = result["median_s"]
+        change = (after - before) / before if before else 0.0
+        print(f"{stage}: {before:.4f}s -> {after:.4f}s ({change:+.1%})", file=sys.stderr)
+        if change > threshold:
+            regressions.append(stage)
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the build stages on a synthetic corpus.")
+    add_corpus_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for the full build stage")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed slowdown per stage before --compare fails (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != results["corpus"]:
+            print("warning: baseline was run on a different corpus", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"regressions: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
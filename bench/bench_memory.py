@@ -0,0 +1,89 @@
+"""Bytes per node for TextNode / HTMLNode trees, compared with the dict-based classes.
+
+Run from the repository root:
+
+    python3 bench/bench_memory.py [--nodes N]
+"""
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType
+from htmlnode import LeafNode, ParentNode
+
+# the node classes as they were before __slots__, kept here as the baseline
+class DictTextNode():
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag, value, None, props)
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag, None, children, props)
+
+def measure(build, count: int) -> float:
+    # the node texts are shared so only the node objects themselves are counted
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del nodes
+    return (after - before) / count
+
+def build_text_nodes(cls):
+    def build(count):
+        return [cls("some text", TextType.TEXT) for _ in range(count)]
+    return build
+
+def build_leaf_nodes(cls):
+    def build(count):
+        return [cls("b", "some text") for _ in range(count)]
+    return build
+
+def build_tree(leaf_cls, parent_cls):
+    # one heading per four leaves; heading tags are built at runtime like process_heading's
+    def build(count):
+        paragraphs = []
+        for i in range(count // 5):
+            leaves = [leaf_cls(None, "text"), leaf_cls("b", "bold"), leaf_cls(None, "text"), leaf_cls("i", "it")]
+            paragraphs.append(parent_cls(f"h{i % 6 + 1}", leaves))
+        return parent_cls("div", paragraphs)
+    return build
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=200_000)
+    args = parser.parse_args()
+
+    cases = {
+        "TextNode": (build_text_nodes(DictTextNode), build_text_nodes(TextNode)),
+        "LeafNode": (build_leaf_nodes(DictLeafNode), build_leaf_nodes(LeafNode)),
+        "tree": (build_tree(DictLeafNode, DictParentNode), build_tree(LeafNode, ParentNode)),
+    }
+    results = {}
+    for name, (before, after) in cases.items():
+        results[name] = {
+            "before_bytes_per_node": round(measure(before, args.nodes), 1),
+            "after_bytes_per_node": round(measure(after, args.nodes), 1),
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Synthetic markdown corpus generator for the benchmarks.
+
+    python3 bench/corpus.py /tmp/corpus --pages 2000 --blocks 40
+"""
+import argparse
+import os
+import random
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog elves dwarves hobbits ring mountain river "
+    "forest shadow light song king road wizard tower stone sword journey fellowship"
+).split()
+
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 6,
+    "heading": 1,
+    "quote": 1,
+    "unordered_list": 1,
+    "ordered_list": 1,
+    "code": 1,
+}
+
+def parse_block_mix(value: str) -> dict[str, int]:
+    # "paragraph=6,code=2" -> {"paragraph": 6, "code": 2}
+    mix = {}
+    for item in value.split(","):
+        name, weight = item.split("=")
+        if name not in DEFAULT_BLOCK_MIX:
+            raise ValueError(f"Unknown block type: {name}")
+        mix[name] = int(weight)
+    return mix
+
+class CorpusGenerator:
+    def __init__(self, pages: int, blocks: int = 30, words_per_block: int = 60,
+                 block_mix: dict[str, int] | None = None, link_density: float = 0.02,
+                 emphasis_density: float = 0.05, seed: int = 0) -> None:
+        self.pages = pages
+        self.blocks = blocks
+        self.words_per_block = words_per_block
+        self.block_mix = block_mix or DEFAULT_BLOCK_MIX
+        self.link_density = link_density
+        self.emphasis_density = emphasis_density
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def params(self) -> dict:
+        return {
+            "pages": self.pages,
+            "blocks": self.blocks,
+            "words_per_block": self.words_per_block,
+            "block_mix": self.block_mix,
+            "link_density": self.link_density,
+            "emphasis_density": self.emphasis_density,
+            "seed": self.seed,
+        }
+
+    def page_path(self, index: int) -> str:
+        # group pages into sections so the content tree has some depth
+        return os.path.join(f"section{index // 100}", f"page{index}", "index.md")
+
+    def inline_text(self, words: int) -> str:
+        parts = []
+        for _ in range(words):
+            word = self.rng.choice(WORDS)
+            roll = self.rng.random()
+            if roll < self.link_density:
+                target = self.rng.randrange(self.pages)
+                word = f"[{word}](/section{target // 100}/page{target})"
+            elif roll < self.link_density + self.emphasis_density:
+                word = self.rng.choice(("**{}**", "_{}_", "`{}`")).format(word)
+            parts.append(word)
+        return " ".join(parts)
+
+    def block(self, kind: str) -> str:
+        words = max(1, self.words_per_block)
+        match kind:
+            case "paragraph":
+                lines = [self.inline_text(max(1, words // 4)) for _ in range(4)]
+                return "\n".join(lines)
+            case "heading":
+                return f"{'#' * self.rng.randint(2, 6)} {self.inline_text(6)}"
+            case "quote":
+                return "\n".join(f"> {self.inline_text(max(1, words // 3))}" for _ in range(3))
+            case "unordered_list":
+                return "\n".join(f"- {self.inline_text(max(1, words // 5))}" for _ in range(5))
+            case "ordered_list":
+                return "\n".join(f"{i}. {self.inline_text(max(1, words // 5))}" for i in range(1, 6))
+            case "code":
+                body = "\n".join(" ".join(self.rng.choice(WORDS) for _ in range(8)) for _ in range(6))
+                return f"```\n{body}\n```"
+            case _:
+                raise ValueError(f"Invalid block type: {kind}")
+
+    def page(self, index: int) -> str:
+        kinds = list(self.block_mix)
+        weights = [self.block_mix[kind] for kind in kinds]
+        blocks = [f"# Page {index}"]
+        for kind in self.rng.choices(kinds, weights, k=self.blocks):
+            blocks.append(self.block(kind))
+        return "\n\n".join(blocks) + "\n"
+
+    def write(self, dest: str) -> list[str]:
+        paths = []
+        for index in range(self.pages):
+            path = os.path.join(dest, self.page_path(index))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(self.page(index))
+            paths.append(path)
+        return paths
+
+def add_corpus_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=30, help="blocks per page")
+    parser.add_argument("--words-per-block", type=int, default=60)
+    parser.add_argument("--block-mix", type=parse_block_mix, default=None,
+                        help='weights like "paragraph=6,heading=1,code=1"')
+    parser.add_argument("--link-density", type=float, default=0.02, help="fraction of words that are links")
+    parser.add_argument("--emphasis-density", type=float, default=0.05,
+                        help="fraction of words that are bold, italic or code")
+    parser.add_argument("--seed", type=int, default=0)
+
+def generator_from_args(args: argparse.Namespace) -> CorpusGenerator:
+    return CorpusGenerator(args.pages, args.blocks, args.words_per_block, args.block_mix,
+                           args.link_density, args.emphasis_density, args.seed)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic markdown corpus.")
+    parser.add_argument("dest")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    paths = generator_from_args(args).write(args.dest)
+    print(f"wrote {len(paths)} pages to {args.dest}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import json
+import os
+
+from manifest import hash_file
+from inventory import scan_tree
+from sink import DISK
+
+ASSET_MANIFEST = "asset-manifest.json"
+# hex digits of the content hash kept in a fingerprinted name
+FINGERPRINT_LENGTH = 10
+
+def fingerprint_name(path: str, digest: str) -> str:
+    # images/logo.png -> images/logo.<hash>.png
+    root, extension = os.path.splitext(path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+def hash_static_files(static_dir: str, recorded: dict[str, dict],
+                      inventory: 'Inventory | None' = None) -> dict[str, str]:
+    """Map the site URL of every static file to its content hash.
+
+    recorded holds the hash, size and mtime of each file from earlier builds;
+    files whose size and mtime are unchanged are not re-read.
+    """
+    if inventory is None:
+        inventory = scan_tree(static_dir, {})
+    hashes = {}
+    seen = set()
+    for path, (mtime_ns, size) in inventory.files.items():
+        entry = recorded.get(path)
+        if entry is None or entry["size"] != size or entry["mtime_ns"] != mtime_ns:
+            entry = {"hash": hash_file(path), "size": size, "mtime_ns": mtime_ns}
+            recorded[path] = entry
+        seen.add(path)
+        hashes["/" + os.path.relpath(path, static_dir).replace(os.sep, "/")] = entry["hash"]
+    for path in set(recorded) - seen:
+        del recorded[path]
+    return hashes
+
+def fingerprint_assets(hashes: dict[str, str]) -> dict[str, str]:
+    # names only depend on content, so an unchanged file keeps its fingerprint across builds
+    return {url: fingerprint_name(url, digest) for url, digest in hashes.items()}
+
+def write_asset_manifest(dest_dir: str, assets: dict[str, str], sink: 'OutputSink' = DISK) -> str:
+    # original URL -> fingerprinted URL, for tooling outside the build (CDN rules, other sites)
+    path = os.path.join(dest_dir, ASSET_MANIFEST)
+    sink.write_bytes(path, (json.dumps(assets, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    return path
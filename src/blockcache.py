@@ -0,0 +1,103 @@
+import functools
+import hashlib
+import os
+import sqlite3
+import time
+
+# bump when the block renderer changes so stale fragments are never reused
+CACHE_VERSION = "1"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class BlockCache:
+    """On-disk map of block -> rendered HTML fragment with LRU eviction.
+
+    Keys are hashes of the block text, its block type and the render context
+    (basepath etc.). Recency updates are batched and written on flush().
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._used = set()
+        self._pending = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # worker processes share the file, so wait on locks instead of failing
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS blocks ("
+            "key TEXT PRIMARY KEY, html TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS blocks_last_used ON blocks (last_used)")
+        self.db.commit()
+
+    @staticmethod
+    def key(block: str, block_type: 'BlockType', context: str) -> str:
+        digest = hashlib.sha256()
+        for part in (CACHE_VERSION, block_type.value, context, block):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        if key in self._pending:
+            self.hits += 1
+            return self._pending[key]
+        row = self.db.execute("SELECT html FROM blocks WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used.add(key)
+        return row[0]
+
+    def put(self, key: str, html: str) -> None:
+        self._pending[key] = html
+
+    def flush(self) -> None:
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO blocks (key, html, size, last_used) VALUES (?, ?, ?, ?)",
+                [(key, html, len(html.encode()), now) for key, html in self._pending.items()],
+            )
+            self.db.executemany("UPDATE blocks SET last_used = ? WHERE key = ?", [(now, key) for key in self._used])
+        self._pending = {}
+        self._used = set()
+
+    def total_bytes(self) -> int:
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+
+    def evict(self) -> int:
+        # drop least recently used fragments until the cache fits in max_bytes
+        self.flush()
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return 0
+        evicted = 0
+        with self.db:
+            rows = self.db.execute("SELECT key, size FROM blocks ORDER BY last_used ASC")
+            doomed = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((key,))
+                excess -= size
+            self.db.executemany("DELETE FROM blocks WHERE key = ?", doomed)
+            evicted = len(doomed)
+        return evicted
+
+    def close(self) -> None:
+        self.flush()
+        self.db.close()
+
+@functools.lru_cache(maxsize=None)
+def _open_block_cache(path: str, pid: int) -> BlockCache:
+    return BlockCache(path)
+
+def open_block_cache(path: str) -> BlockCache:
+    # one connection per process - keyed by pid so forked workers never reuse the parent's
+    return _open_block_cache(path, os.getpid())
@@ -0,0 +1,273 @@
+import contextlib
+import os
+import shutil
+
+from functions import discover_pages, generate_pages, page_output_path, render_page, STREAM_THRESHOLD
+from template import Template
+from manifest import BuildManifest
+from sync import sync_dir, sync_paths, destination_path, remove_empty_dirs
+from sink import DISK, TargetSink
+from assets import hash_static_files, fingerprint_assets, write_asset_manifest, ASSET_MANIFEST
+from imagesize import image_dimensions
+from compress import precompress_tree, MIN_SIZE
+from blockcache import BlockCache, DEFAULT_MAX_BYTES
+from depgraph import SiteResolver, DependencyIndex, explain
+from inventory import scan_tree, stat_signature
+from shard import select_shard, write_shard_manifest
+
+# below this many pages a targeted rebuild renders in-process; starting a pool costs more
+MIN_POOL_PAGES = 8
+
+class SiteBuilder:
+    """One site build configuration that can be run repeatedly in the same process.
+
+    build() is the regular incremental build. rebuild() takes the paths a
+    watcher saw change and regenerates only the pages and static files they
+    affect, using the reverse edges of the dependency graph. render() writes
+    a complete build through an output sink instead.
+
+    With extra targets, (basepath, directory) pairs besides the main one,
+    every page is still rendered once: a TargetSink writes it into each
+    target with that target's basepath, and static files are shared between
+    the targets through hardlinks.
+
+    With shard (index, count), only the pages stable-hashed to that shard
+    are built, static files only by shard 0, and a shard manifest is written
+    for merge_shards.
+    """
+
+    def __init__(self, content_dir: str, static_dir: str, template_path: str, dest_dir: str, basepath: str,
+                 manifest_path: str, jobs: int = 1, checksum: bool = False, hardlink: bool = False,
+                 stream_threshold: int = STREAM_THRESHOLD, block_cache: str | None = None,
+                 block_cache_bytes: int = DEFAULT_MAX_BYTES, profiler: 'BuildProfiler | None' = None,
+                 fingerprint: bool = False, precompress: bool = False, precompress_min_size: int = MIN_SIZE,
+                 minify: bool = False, image_sizes: bool = False,
+                 targets: list[tuple[str, str]] | None = None, shard: tuple[int, int] | None = None) -> None:
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        self.jobs = jobs
+        self.checksum = checksum
+        self.hardlink = hardlink
+        self.stream_threshold = stream_threshold
+        self.block_cache = block_cache
+        self.block_cache_bytes = block_cache_bytes
+        self.profiler = profiler
+        self.fingerprint = fingerprint
+        self.minify = minify
+        self.image_sizes = image_sizes
+        self.assets = None
+        self.images = None
+        self.precompress = precompress
+        self.precompress_min_size = precompress_min_size
+        self.targets = [(basepath, dest_dir), *(targets or [])]
+        self.sink = TargetSink(self.targets) if len(self.targets) > 1 else DISK
+        # pages are rendered with a placeholder basepath that the sink fills in per target
+        self.page_basepath = self.sink.marker if len(self.targets) > 1 else basepath
+        self.shard = shard
+        # (signature, Template) last compiled by compiled_template
+        self.template = None
+        self.manifest = BuildManifest(manifest_path)
+        self.manifest.resolver = SiteResolver(self.content_dir, self.static_dir)
+        self.index = None
+
+    def build(self, full: bool = False) -> None:
+        manifest = self.manifest
+        manifest.start_build()
+        if full:
+            manifest.clear()
+            for _, dest_dir in self.targets:
+                shutil.rmtree(dest_dir, ignore_errors=True)
+
+        profiler = self.profiler
+        static_stage = profiler.stage("static_copy") if profiler else contextlib.nullcontext()
+
+        # one scandir pass per tree, reusing the listings of directories that did not change
+        content, static = self.scan()
+
+        # copy only changed static files, leaving generated pages alone
+        with static_stage:
+            self.assets, self.images = self.static_maps(static)
+            assets = self.assets
+            if self.owns_static():
+                stats = sync_dir(self.static_dir, self.dest_dir, manifest.assets,
+                                 checksum=self.checksum, hardlink=self.hardlink, assets=assets, inventory=static)
+                # the other targets link to the copies just made
+                for _, dest_dir in self.targets[1:]:
+                    sync_dir(self.static_dir, dest_dir, manifest.assets, checksum=self.checksum, assets=assets,
+                             inventory=static, link_from=self.dest_dir)
+                print(f"static: {stats['copied']} copied, {stats['unchanged']} unchanged, "
+                      f"{stats['removed']} removed")
+
+        all_pages = discover_pages(self.content_dir, self.dest_dir, content)
+        pages = all_pages if self.shard is None else select_shard(all_pages, self.content_dir, self.shard)
+        generate_pages(pages, self.template_path, self.page_basepath, manifest, self.jobs, profiler,
+                       self.stream_threshold, self.block_cache, self.sink, assets, self.minify, self.images,
+                       self.compiled_template(self.page_basepath, assets, self.images))
+        if assets is not None and self.owns_static():
+            write_asset_manifest(self.dest_dir, assets, self.sink)
+        else:
+            # fingerprinting was switched off since the last build
+            for _, dest_dir in self.targets:
+                if os.path.exists(os.path.join(dest_dir, ASSET_MANIFEST)):
+                    os.remove(os.path.join(dest_dir, ASSET_MANIFEST))
+        self.evict_block_cache()
+
+        # remove pages whose markdown source no longer exists
+        for output in manifest.prune():
+            self.remove_target_copies(output)
+            print(f"Removed stale page {output}")
+        self.compress_outputs()
+        manifest.save()
+        self.index = DependencyIndex(manifest.resolver, manifest.pages)
+        if self.shard is not None:
+            path = write_shard_manifest(self.dest_dir, self.shard, self.basepath, self.content_dir, all_pages, pages)
+            print(f"shard {self.shard[0]}/{self.shard[1]}: {len(pages)} of {len(all_pages)} pages, see {path}")
+
+    def owns_static(self) -> bool:
+        # sharded builds leave the static files to the first shard
+        return self.shard is None or self.shard[0] == 0
+
+    def remove_target_copies(self, output: str) -> None:
+        # the manifest tracks outputs in the main target; the other targets mirror its layout
+        for _, dest_dir in self.targets[1:]:
+            path = self.sink.target_path(output, dest_dir)
+            if os.path.isfile(path):
+                os.remove(path)
+                remove_empty_dirs(os.path.dirname(path), dest_dir)
+
+    def compress_outputs(self) -> None:
+        manifest = self.manifest
+        if not self.precompress:
+            # precompression was switched off since the last build
+            for path in manifest.compressed:
+                if os.path.isfile(path):
+                    os.remove(path)
+            manifest.compressed = []
+            return
+        siblings = set()
+        for _, dest_dir in self.targets:
+            stats = precompress_tree(dest_dir, self.jobs, self.precompress_min_size, siblings, manifest.compressed)
+            print(f"precompress: {stats['compressed']} compressed, {stats['current']} current, "
+                  f"{stats['skipped']} below {self.precompress_min_size} bytes, {stats['removed']} removed")
+        manifest.compressed = sorted(siblings)
+
+    def scan(self) -> tuple['Inventory', 'Inventory']:
+        # inventories of content/ and static/; their stats spare the manifest a stat per page
+        manifest = self.manifest
+        content = scan_tree(self.content_dir, manifest.directories)
+        static = scan_tree(self.static_dir, manifest.directories)
+        manifest.file_stats = content.files
+        return content, static
+
+    def static_maps(self, inventory: 'Inventory | None' = None) -> tuple[dict[str, str] | None,
+                                                                          dict[str, tuple[int, int]] | None]:
+        # fingerprinted names and image sizes, both derived from the content hashes of static/
+        if not self.fingerprint and not self.image_sizes:
+            return None, None
+        hashes = hash_static_files(self.static_dir, self.manifest.static_hashes, inventory)
+        assets = fingerprint_assets(hashes) if self.fingerprint else None
+        images = image_dimensions(self.static_dir, hashes, self.manifest.image_sizes) if self.image_sizes else None
+        return assets, images
+
+    def render(self, sink: 'OutputSink') -> None:
+        # a complete, non-incremental build written through sink instead of straight into dest_dir
+        content, static = scan_tree(self.content_dir, {}), scan_tree(self.static_dir, {})
+        assets, images = self.static_maps(static)
+        for file_path_src in static.files:
+            sink.copy_file(file_path_src, destination_path(self.static_dir, self.dest_dir, file_path_src, assets),
+                           self.hardlink)
+        print(f"static: {len(static.files)} copied")
+
+        pages = discover_pages(self.content_dir, self.dest_dir, content)
+        generate_pages(pages, self.template_path, self.basepath, None, self.jobs, None,
+                       self.stream_threshold, self.block_cache, sink, assets, self.minify, images)
+        if assets is not None:
+            write_asset_manifest(self.dest_dir, assets, sink)
+
+    def page_html(self, source: str) -> str:
+        # one page as a build would write it for the main target, without writing anything
+        if self.index is None:
+            self.assets, self.images = self.static_maps()
+        with open(source, "r") as md:
+            return render_page(md.read(), self.compiled_template(self.basepath, self.assets, self.images))
+
+    def compiled_template(self, basepath: str, assets: dict[str, str] | None,
+                          images: dict[str, tuple[int, int]] | None) -> 'Template':
+        # kept between builds of a long-running builder while the template file and what it was
+        # compiled with are unchanged; the maps are compared by value, a rebuilt map is usually equal
+        signature = (stat_signature(self.template_path), basepath, assets, images)
+        if self.template is None or self.template[0] != signature:
+            self.template = (signature, Template.from_file(self.template_path, basepath, assets, self.minify, images))
+        return self.template[1]
+
+    def explain(self, page: str) -> str:
+        # compares against the template hash and basepath a build would record, compile options included
+        assets, images = self.static_maps()
+        template = self.compiled_template(self.page_basepath, assets, images)
+        template_hash = template.output_hash(self.manifest.template_hash(self.template_path))
+        return explain(self.manifest, self.manifest.resolver, page, self.template_path, template_hash,
+                       self.page_basepath)
+
+    def evict_block_cache(self) -> None:
+        # keep the block cache within its size budget
+        if self.block_cache is None:
+            return
+        cache = BlockCache(self.block_cache, self.block_cache_bytes)
+        evicted = cache.evict()
+        cache.close()
+        if evicted:
+            print(f"Evicted {evicted} blocks from {self.block_cache}")
+
+    def in_dir(self, path: str, directory: str) -> bool:
+        return path == directory or path.startswith(directory + os.sep)
+
+    def rebuild(self, changed: set[str], rescan: bool = False) -> None:
+        changed = {os.path.normpath(path) for path in changed}
+        static_paths = [path for path in changed if self.in_dir(path, self.static_dir)]
+        # a new template touches every page, and a rescan means the watcher lost track;
+        # a changed static file may change fingerprints or image sizes, which a full pass recomputes,
+        # as it does for the static files of extra targets
+        static_maps = self.fingerprint or self.image_sizes or len(self.targets) > 1
+        if rescan or self.index is None or self.template_path in changed or (static_maps and static_paths):
+            self.build()
+            return
+
+        manifest = self.manifest
+        manifest.start_build()
+        affected = set()
+
+        if static_paths:
+            stats = sync_paths(self.static_dir, self.dest_dir, static_paths, manifest.assets,
+                               checksum=self.checksum, hardlink=self.hardlink)
+            print(f"static: {stats['copied']} copied, {stats['unchanged']} unchanged, {stats['removed']} removed")
+            for path in static_paths:
+                affected |= self.index.dependents(path)
+
+        for path in sorted(changed):
+            if not self.in_dir(path, self.content_dir) or not path.endswith(".md"):
+                continue
+            # pages linking here may now resolve differently, whether it appeared, changed or went away
+            affected |= self.index.dependents(path)
+            if os.path.isfile(path):
+                affected.add(path)
+            else:
+                output = manifest.remove_page(path)
+                self.index.remove(path)
+                if output is not None:
+                    self.remove_target_copies(output)
+                    print(f"Removed stale page {output}")
+
+        pages = [(source, page_output_path(source, self.content_dir, self.dest_dir))
+                 for source in sorted(affected) if os.path.isfile(source)]
+        if pages:
+            jobs = self.jobs if len(pages) >= MIN_POOL_PAGES else 1
+            generate_pages(pages, self.template_path, self.page_basepath, manifest, jobs, None,
+                           self.stream_threshold, self.block_cache, self.sink, self.assets, self.minify, self.images,
+                           self.compiled_template(self.page_basepath, self.assets, self.images))
+            for source, _ in pages:
+                self.index.update(source, manifest.pages[source])
+        self.compress_outputs()
+        manifest.save()
@@ -0,0 +1,73 @@
+"""Thin client for the build daemon (main.py --daemon).
+
+    python3 src/client.py [main.py options]          build, like main.py
+    python3 src/client.py render PAGE [options]      print the HTML of one page
+    python3 src/client.py stop                       stop the daemon
+    python3 src/client.py merge [options]            merge shards, always in this process
+
+Only the standard library is imported here, so a request costs little more
+than interpreter startup. Without a daemon listening, builds and renders
+run in this process instead.
+"""
+import json
+import os
+import socket
+import sys
+
+# same path as daemon.SOCKET_PATH; not imported, to keep the client light
+SOCKET_PATH = os.path.join(".build", "daemon.sock")
+
+def request(message: dict, output=None) -> dict | None:
+    # streams the daemon's output to output (stdout by default); None when no daemon is listening
+    output = output or sys.stdout
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(SOCKET_PATH)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    with sock, sock.makefile("rwb") as stream:
+        stream.write(json.dumps(message).encode() + b"\n")
+        stream.flush()
+        for line in stream:
+            reply = json.loads(line)
+            if "output" in reply:
+                output.write(reply["output"])
+                output.flush()
+            else:
+                return reply
+    return {"exit": 1}
+
+def run_in_process(command: str, argv: list[str], page: str | None = None) -> int:
+    import main
+    if command == "render":
+        print(main.make_builder(main.parse_args(argv)).page_html(page), end="")
+        return 0
+    sys.argv = ["main.py", *argv]
+    main.main()
+    return 0
+
+def client(argv: list[str]) -> int:
+    command, page = "build", None
+    if argv[:1] == ["stop"]:
+        reply = request({"command": "stop"})
+        if reply is None:
+            print("no build daemon is running", file=sys.stderr)
+            return 1
+        return reply["exit"]
+    if argv[:1] == ["merge"]:
+        # copies the shard outputs, there is nothing for a warm builder to do
+        return run_in_process(command, argv)
+    if argv[:1] == ["render"]:
+        if len(argv) < 2:
+            print("usage: client.py render PAGE [main.py options]", file=sys.stderr)
+            return 2
+        command, page, argv = "render", argv[1], argv[2:]
+
+    reply = request({"command": command, "argv": argv, "page": page, "cwd": os.getcwd()})
+    if reply is None or "fallback" in reply:
+        return run_in_process(command, argv, page)
+    return reply["exit"]
+
+if __name__ == "__main__":
+    sys.exit(client(sys.argv[1:]))
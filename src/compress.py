@@ -0,0 +1,101 @@
+import functools
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+from sync import remove_empty_dirs
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map")
+# below this many bytes the compressed response is barely smaller and costs the client a decode
+MIN_SIZE = 1024
+
+def encodings() -> list[str]:
+    # sibling suffixes to write, brotli only when the module is installed
+    return [".gz", ".br"] if brotli is not None else [".gz"]
+
+def compress_bytes(data: bytes, suffix: str) -> bytes:
+    if suffix == ".br":
+        return brotli.compress(data, quality=11)
+    # no name and a fixed mtime in the header, so identical input gives identical output
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def is_current(path: str, sibling: str) -> bool:
+    # siblings are stamped with the mtime of the file they were compressed from
+    try:
+        return os.stat(sibling).st_mtime_ns == os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+def precompress_file(path: str, min_size: int = MIN_SIZE) -> str:
+    # returns "compressed", "current" or "skipped"
+    stat = os.stat(path)
+    if stat.st_size < min_size:
+        return "skipped"
+    stale = [suffix for suffix in encodings() if not is_current(path, path + suffix)]
+    if not stale:
+        return "current"
+
+    with open(path, "rb") as f:
+        data = f.read()
+    for suffix in stale:
+        sibling = path + suffix
+        compressed = compress_bytes(data, suffix)
+        tmp_path = f"{sibling}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, sibling)
+    return "compressed"
+
+def remove_orphans(root: str, previous: Iterable[str], current: set[str]) -> int:
+    # siblings written last time whose file is gone or fell below the minimum size; other .gz/.br
+    # files under root are left alone, they may have been shipped in static/
+    prefix = root.rstrip(os.sep) + os.sep
+    removed = 0
+    for path in previous:
+        if path in current or not path.startswith(prefix) or not os.path.isfile(path):
+            continue
+        os.remove(path)
+        remove_empty_dirs(os.path.dirname(path), root)
+        removed += 1
+    return removed
+
+def precompress_tree(root: str, jobs: int = 1, min_size: int = MIN_SIZE,
+                     siblings: set[str] | None = None, previous: Iterable[str] = ()) -> dict[str, int]:
+    """Write .gz (and .br) siblings for the compressible files under root.
+
+    Files smaller than min_size are left alone, and files whose siblings were
+    written from the current version are not compressed again. previous
+    lists the siblings written by the last run; those no longer wanted are
+    removed. The path of every sibling now under root is added to siblings,
+    if given.
+    """
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                paths.append(os.path.join(dirpath, filename))
+
+    compress = functools.partial(precompress_file, min_size=min_size)
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(compress, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+    else:
+        results = [compress(path) for path in paths]
+
+    stats = {"compressed": 0, "current": 0, "skipped": 0}
+    for result in results:
+        stats[result] += 1
+    compressed = {path + suffix for path, result in zip(paths, results) if result != "skipped"
+                  for suffix in encodings()}
+    stats["removed"] = remove_orphans(root, previous, compressed)
+    if siblings is not None:
+        siblings.update(compressed)
+    return stats
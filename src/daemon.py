@@ -0,0 +1,138 @@
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+import traceback
+from typing import Callable
+
+from inventory import stat_signature
+
+SOCKET_PATH = ".build/daemon.sock"
+# main.py options the daemon leaves to the client, which then runs them in-process
+IN_PROCESS_OPTIONS = ("explain", "serve", "watch", "archive", "profile", "daemon")
+# options that do not change what a builder is
+PER_RUN_OPTIONS = ("full", "top")
+
+class SocketOutput(io.TextIOBase):
+    # stdout of a request, forwarded to the client line by line
+    def __init__(self, wfile) -> None:
+        self.wfile = wfile
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text:
+            self.wfile.write(json.dumps({"output": text}).encode() + b"\n")
+        return len(text)
+
+class BuildDaemon:
+    """Runs builds and page renders for client.py in one long-lived process.
+
+    A SiteBuilder is kept per build configuration, so its manifest,
+    dependency index, directory inventory, compiled template and block cache
+    connection stay warm between requests. A builder is recreated when the
+    manifest on disk was written by someone else since its last build.
+    """
+
+    def __init__(self, parse_args: Callable, make_builder: Callable) -> None:
+        self.parse_args = parse_args
+        self.make_builder = make_builder
+        self.builders = {}
+        self.signatures = {}
+
+    def builder_for(self, args) -> tuple[str, 'SiteBuilder']:
+        key = json.dumps({name: value for name, value in vars(args).items() if name not in PER_RUN_OPTIONS},
+                         sort_keys=True)
+        builder = self.builders.get(key)
+        if builder is None or stat_signature(builder.manifest.path) != self.signatures[key]:
+            builder = self.make_builder(args)
+            self.builders[key] = builder
+            self.signatures[key] = stat_signature(builder.manifest.path)
+        return key, builder
+
+    def handle(self, request: dict) -> dict:
+        # returns the final message for the client: {"exit": code} or {"fallback": reason}
+        if request.get("cwd", os.getcwd()) != os.getcwd():
+            # content/, static/ and docs/ are relative to the directory the daemon was started in
+            return {"fallback": f"the daemon builds {os.getcwd()}"}
+        if request.get("argv", [])[:1] == ["merge"]:
+            # main.py merge is a subcommand of its own, not a build with basepath "merge"
+            return {"fallback": "merge runs in the client"}
+        try:
+            args = self.parse_args(request.get("argv", []))
+        except SystemExit as e:
+            return {"exit": e.code}
+        in_process = [option for option in IN_PROCESS_OPTIONS if getattr(args, option)]
+        if in_process:
+            return {"fallback": f"--{in_process[0]} runs in the client"}
+
+        key, builder = self.builder_for(args)
+        try:
+            if request["command"] == "render":
+                print(builder.page_html(request["page"]), end="")
+            else:
+                builder.build(full=args.full)
+        except Exception:
+            # the builder may be half way through an update, start the next request from disk
+            del self.builders[key]
+            traceback.print_exc()
+            return {"exit": 1}
+        self.signatures[key] = stat_signature(builder.manifest.path)
+        return {"exit": 0}
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    daemon = None
+
+    def handle(self) -> None:
+        request = json.loads(self.rfile.readline())
+        if request["command"] == "stop":
+            # shutdown() waits for serve_forever, which is running this handler
+            threading.Thread(target=self.server.shutdown).start()
+            reply = {"exit": 0}
+        elif request["command"] == "ping":
+            reply = {"exit": 0, "pid": os.getpid()}
+        else:
+            output = SocketOutput(self.wfile)
+            # requests are handled one at a time, so redirecting the process-wide streams is safe
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                reply = self.daemon.handle(request)
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+def is_listening(socket_path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+def make_daemon_server(daemon: 'BuildDaemon', socket_path: str = SOCKET_PATH) -> socketserver.UnixStreamServer:
+    if os.path.exists(socket_path):
+        if is_listening(socket_path):
+            raise RuntimeError(f"a build daemon is already listening on {socket_path}")
+        # left behind by a daemon that did not shut down cleanly
+        os.remove(socket_path)
+    directory = os.path.dirname(socket_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handler = type("BoundDaemonHandler", (DaemonHandler,), {"daemon": daemon})
+    server = socketserver.UnixStreamServer(socket_path, handler)
+    # builds run with the daemon owner's permissions, so only the owner may connect
+    os.chmod(socket_path, 0o600)
+    return server
+
+def serve_daemon(daemon: 'BuildDaemon', socket_path: str = SOCKET_PATH) -> None:
+    server = make_daemon_server(daemon, socket_path)
+    print(f"Build daemon listening on {socket_path} (stop with 'python3 src/client.py stop')")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(socket_path)
@@ -0,0 +1,205 @@
+import os
+from typing import Iterable
+
+from functions import scan_blocks, extract_markdown_images, extract_markdown_links
+from manifest import hash_file
+from textnode import BlockType
+
+def extract_references(lines: Iterable[str]) -> tuple[list[str], list[str]]:
+    # link and image URLs of a page, in document order; code blocks are skipped
+    links = []
+    images = []
+    for block in scan_blocks(lines):
+        if block.block_type is BlockType.CODE:
+            continue
+        images.extend(url for _, url in extract_markdown_images(block.text))
+        links.extend(url for _, url in extract_markdown_links(block.text))
+    return links, images
+
+class SiteResolver:
+    """Maps site-absolute URLs to the content/ page or static/ file they refer to.
+
+    File signatures (size, mtime, hash) are memoized, so an image embedded by
+    many pages is only stat-ed and hashed once per build.
+    """
+
+    def __init__(self, content_dir: str, static_dir: str) -> None:
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self._signatures = {}
+
+    @staticmethod
+    def site_path(url: str) -> str | None:
+        # only "/..." URLs point into this site; drop any query or fragment
+        if not url.startswith("/") or url.startswith("//"):
+            return None
+        return url.split("#", 1)[0].split("?", 1)[0]
+
+    def clear_cache(self) -> None:
+        self._signatures = {}
+
+    def link_candidates(self, url: str) -> list[str]:
+        # the content files a site URL could be rendered from, in lookup order
+        path = self.site_path(url)
+        if path is None:
+            return []
+        path = path.strip("/")
+        if path.endswith(".html"):
+            path = path[:-len(".html")]
+        if path.endswith("index"):
+            path = path[:-len("index")].rstrip("/")
+        candidates = [os.path.normpath(os.path.join(self.content_dir, path, "index.md"))]
+        if path:
+            candidates.append(os.path.normpath(os.path.join(self.content_dir, f"{path}.md")))
+        return candidates
+
+    def resolve_link(self, url: str) -> str | None:
+        for candidate in self.link_candidates(url):
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def resolve_image(self, url: str) -> str | None:
+        path = self.site_path(url)
+        if path is None:
+            return None
+        candidate = os.path.join(self.static_dir, path.lstrip("/"))
+        return os.path.normpath(candidate) if os.path.isfile(candidate) else None
+
+    def signature(self, path: str, recorded: dict | None = None) -> dict:
+        if path in self._signatures:
+            return self._signatures[path]
+        stat = os.stat(path)
+        # same size and mtime as last time -> reuse the recorded hash
+        if recorded and recorded["size"] == stat.st_size and recorded["mtime_ns"] == stat.st_mtime_ns:
+            digest = recorded["hash"]
+        else:
+            digest = hash_file(path)
+        self._signatures[path] = {"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+        return self._signatures[path]
+
+    def page_dependencies(self, lines: Iterable[str]) -> dict:
+        links, images = extract_references(lines)
+        dependencies = {"links": {}, "images": {}}
+        for url in links:
+            if self.site_path(url) is not None:
+                dependencies["links"][url] = self.resolve_link(url)
+                # a link to a static file is rewritten to its fingerprinted name, like an embed
+                path = self.resolve_image(url)
+                if path is not None:
+                    dependencies["images"][url] = self.signature(path)
+        for url in images:
+            path = self.resolve_image(url)
+            if path is not None:
+                dependencies["images"][url] = self.signature(path)
+            elif self.site_path(url) is not None:
+                dependencies["images"][url] = None
+        return dependencies
+
+    def changes(self, dependencies: dict) -> list[str]:
+        # why the recorded dependencies no longer match the site
+        reasons = []
+        for url, target in dependencies.get("links", {}).items():
+            current = self.resolve_link(url)
+            if current != target:
+                reasons.append(f"link {url} now resolves to {current or 'nothing'} (was {target or 'nothing'})")
+        for url, recorded in dependencies.get("images", {}).items():
+            path = self.resolve_image(url)
+            recorded_path = recorded["path"] if recorded else None
+            if path != recorded_path:
+                reasons.append(f"image {url} now resolves to {path or 'nothing'} (was {recorded_path or 'nothing'})")
+            elif path is not None and self.signature(path, recorded)["hash"] != recorded["hash"]:
+                reasons.append(f"image {url} changed ({path})")
+        return reasons
+
+def dependents(pages: dict, source: str) -> list[str]:
+    # reverse edges: pages that link to or embed source
+    linked_from = []
+    for page, entry in sorted(pages.items()):
+        dependencies = entry.get("dependencies", {})
+        if source in dependencies.get("links", {}).values():
+            linked_from.append(page)
+        elif any(image and image["path"] == source for image in dependencies.get("images", {}).values()):
+            linked_from.append(page)
+    return linked_from
+
+class DependencyIndex:
+    """Reverse edges of the dependency graph, kept up to date as pages are recorded.
+
+    Maps every content path a page's links could resolve to, and every image
+    it embeds, to the pages that would need a rebuild if that path appeared,
+    disappeared or changed.
+    """
+
+    def __init__(self, resolver: SiteResolver, pages: dict) -> None:
+        self.resolver = resolver
+        self.edges = {}
+        self._targets = {}
+        for source, entry in pages.items():
+            self.update(source, entry)
+
+    def update(self, source: str, entry: dict) -> None:
+        self.remove(source)
+        dependencies = entry.get("dependencies", {})
+        targets = set()
+        for url in dependencies.get("links", {}):
+            targets.update(self.resolver.link_candidates(url))
+        for url in dependencies.get("images", {}):
+            path = self.resolver.site_path(url)
+            if path is not None:
+                targets.add(os.path.normpath(os.path.join(self.resolver.static_dir, path.lstrip("/"))))
+        self._targets[source] = targets
+        for target in targets:
+            self.edges.setdefault(target, set()).add(source)
+
+    def remove(self, source: str) -> None:
+        for target in self._targets.pop(source, ()):
+            self.edges[target].discard(source)
+
+    def dependents(self, path: str) -> set[str]:
+        return set(self.edges.get(os.path.normpath(path), ()))
+
+def find_page(pages: dict, page: str) -> str | None:
+    # accept a source path, an output path or a site URL
+    if page in pages:
+        return page
+    for source, entry in pages.items():
+        if entry["output"] == page:
+            return source
+    return None
+
+def explain(manifest: 'BuildManifest', resolver: SiteResolver, page: str, template_path: str, template_hash: str,
+            basepath: str) -> str:
+    # template_hash and basepath are the ones the build records pages with (see SiteBuilder.explain)
+    source = find_page(manifest.pages, page) or resolver.resolve_link(page)
+    if source is None:
+        dependents_of = dependents(manifest.pages, os.path.normpath(page))
+        if dependents_of:
+            return "\n".join([f"{page} is not a page; it is used by:"] + [f"  {p}" for p in dependents_of])
+        return f"{page} is not in the build manifest"
+    entry = manifest.pages.get(source)
+    if entry is None:
+        return f"{source} has not been built yet"
+
+    lines = [
+        f"page:     {source}",
+        f"output:   {entry['output']}",
+        f"template: {template_path} ({entry['template'][:12]})",
+        f"basepath: {entry['basepath']!r}",
+    ]
+    dependencies = entry.get("dependencies", {})
+    lines.append("links:")
+    for url, target in dependencies.get("links", {}).items():
+        lines.append(f"  {url} -> {target or 'missing'}")
+    lines.append("images:")
+    for url, image in dependencies.get("images", {}).items():
+        lines.append(f"  {url} -> {image['path'] if image else 'missing'}")
+    lines.append("used by:")
+    for dependent in dependents(manifest.pages, source):
+        lines.append(f"  {dependent}")
+
+    reasons = manifest.stale_reasons(source, entry["output"], template_hash, basepath)
+    lines.append("status:   " + ("up to date" if not reasons else "will rebuild"))
+    for reason in reasons:
+        lines.append(f"  - {reason}")
+    return "\n".join(lines)
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+# the smallest page template with both slots
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+def read_tree(root: str) -> dict[str, bytes]:
+    # every file under root, keyed by its path relative to root
+    tree = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            with open(path, "rb") as f:
+                tree[os.path.relpath(path, root)] = f.read()
+    return tree
+
+class TempDirTestCase(unittest.TestCase):
+    """Test case with a fresh temporary directory as self.root.
+
+    Subclasses that override setUp call super().setUp() first; the
+    directory is removed after their tearDown has run.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+
+    def path(self, *parts: str) -> str:
+        # absolute paths are kept as they are
+        return os.path.join(self.root, *parts)
+
+    def write(self, path: str, data: str | bytes) -> str:
+        path = self.path(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        return path
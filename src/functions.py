@@ -1,8 +1,20 @@
 from htmlnode import LeafNode, ParentNode
-from textnode import TextType, TextNode, BlockType
+from textnode import TextType, TextNode, BlockType, MarkdownBlock
+from template import Template, URL_ATTRIBUTES, rewrite_url
+from minify import minify_tree
+from blockcache import open_block_cache
+from sink import DISK, MemorySink
+from pipeline import AsyncWriter, prefetch, decode_source
+from inventory import scan_tree
+from manifest import HashingReader, snapshot
+import io
 import os
 import re
 import shutil
+from typing import Iterable, Iterator
+import functools
+import itertools
+from concurrent.futures import ProcessPoolExecutor
 
 def text_node_to_html_node(text_node):
     match text_node.text_type:
@@ -101,11 +113,8 @@ def split_nodes_link(old_nodes: list['TextNode']) -> list['TextNode']:
 
     return new_nodes
 
-def text_to_textnodes(text: str) -> list['TextNode']:
-    initial_node = TextNode(text, TextType.TEXT)
-def text_to_textnodes(text: str) -> list['TextNode']:
-    initial_node = TextNode(text, TextType.TEXT)
-def text_to_textnodes(text: str) -> list['TextNode']:
+def text_to_textnodes_chained(text: str) -> list['TextNode']:
+    # the original five-pass pipeline, kept as the reference for text_to_textnodes
     initial_node = TextNode(text, TextType.TEXT)
     bold_delimited = split_nodes_delimiter([initial_node], "**", TextType.BOLD)
     italic_delimited = split_nodes_delimiter(bold_delimited, "_", TextType.ITALIC)
@@ -114,7 +123,61 @@ def text_to_textnodes(text: str) -> list['TextNode']:
     final = split_nodes_image(link_delimited)
     return final
 
+INLINE_DELIMITERS = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+INLINE_START_PATTERN = re.compile(r"\*\*|[_`\[!]")
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+def text_to_textnodes(text: str) -> list['TextNode']:
+    # single left-to-right scan: jump to the next possible inline marker, emit the
+    # pending plain text run only when a complete inline element follows it
+    nodes = []
+    text_start = 0
+    pos = 0
+    while True:
+        match = INLINE_START_PATTERN.search(text, pos)
+        if match is None:
+            break
+        start = match.start()
+        marker = match.group(0)
+
+        if marker in INLINE_DELIMITERS:
+            end = text.find(marker, start + len(marker))
+            if end == -1:
+                raise ValueError(f'Invalid Markdown syntax - missing closing "{marker}"')
+            inner = text[start + len(marker):end]
+            if not inner:
+                inline_nodes = []
+            elif marker == "`":
+                inline_nodes = [TextNode(inner, TextType.CODE)]
+            else:
+                # as in the chained pipeline, links and images inside bold or italic text are still
+                # matched, and the text around them is left plain
+                inline_nodes = split_nodes_image(split_nodes_link([TextNode(inner, INLINE_DELIMITERS[marker])]))
+            next_pos = end + len(marker)
+        else:
+            element = (IMAGE_PATTERN if marker == "!" else LINK_PATTERN).match(text, start)
+            if element is None:
+                # a lone "!" or "[" is plain text
+                pos = start + 1
+                continue
+            text_type = TextType.IMAGE if marker == "!" else TextType.LINK
+            inline_nodes = [TextNode(element.group(1), text_type, element.group(2))]
+            next_pos = element.end()
+
+        if start > text_start:
+            nodes.append(TextNode(text[text_start:start], TextType.TEXT))
+        nodes.extend(inline_nodes)
+        text_start = pos = next_pos
+
+    if text_start < len(text):
+        nodes.append(TextNode(text[text_start:], TextType.TEXT))
+    return nodes
+
 # BLOCK MARKDOWN FUNCTIONS
+# sources larger than this are streamed block by block instead of read whole
+STREAM_THRESHOLD = 16 * 1024 * 1024
+
 def markdown_to_blocks(markdown: str) -> list[str]:
     blocks = markdown.split("\n\n")
     final_blocks = []
@@ -126,6 +189,77 @@ def markdown_to_blocks(markdown: str) -> list[str]:
 
     return final_blocks
 
+def classify_block(text: str) -> 'MarkdownBlock':
+    # same rules and precedence as block_to_block_type + strip_markdown_prefix,
+    # evaluated in one pass over the lines of an already stripped block
+    lines = text.split("\n")
+    first = lines[0]
+
+    level = 0
+    while level < len(first) and level < 7 and first[level] == "#":
+        level += 1
+    if 1 <= level <= 6 and first[level:level + 1] == " ":
+        return MarkdownBlock(BlockType.HEADING, text, text[level + 1:], level)
+
+    if len(lines) > 1 and text.startswith("```") and text.endswith("```"):
+        inner = "".join(line + "\n" for line in lines[1:-1])
+        return MarkdownBlock(BlockType.CODE, text, inner)
+
+    is_quote = is_unordered = is_ordered = True
+    for number, line in enumerate(lines, 1):
+        if is_quote and not line.startswith(">"):
+            is_quote = False
+        if is_unordered and not line.startswith("- "):
+            is_unordered = False
+        if is_ordered and not line.startswith(f"{number}. "):
+            is_ordered = False
+        if not (is_quote or is_unordered or is_ordered):
+            break
+
+    if is_quote:
+        return MarkdownBlock(BlockType.QUOTE, text, " ".join(line[1:].lstrip() for line in lines))
+    if is_unordered:
+        return MarkdownBlock(BlockType.UNORDERED_LIST, text, [line[2:] for line in lines])
+    if is_ordered:
+        return MarkdownBlock(BlockType.ORDERED_LIST, text, [line[line.find(". ") + 2:] for line in lines])
+    return MarkdownBlock(BlockType.PARAGRAPH, text, " ".join(lines))
+
+def opens_fence(line: str) -> bool:
+    # "```" or "```lang" opens a fence; "```code```" on one line is just inline code
+    line = line.strip()
+    return line.startswith("```") and (len(line) == 3 or not line.endswith("```"))
+
+def scan_blocks(lines: Iterable[str]) -> Iterator['MarkdownBlock']:
+    # line-driven block scanner: an empty line ends the current block unless it is
+    # inside an open ``` fence, so fenced code keeps its blank lines. Works on any
+    # iterable of lines (e.g. an open file), holding only the current block.
+    block_lines = []
+    started = False
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\n")
+        if line:
+            if in_fence:
+                if line.rstrip().endswith("```"):
+                    in_fence = False
+            elif not started and line.strip():
+                # the first line with content decides whether the block is a fence
+                started = True
+                in_fence = opens_fence(line)
+            block_lines.append(line)
+            continue
+        if in_fence:
+            block_lines.append(line)
+            continue
+        text = "\n".join(block_lines).strip()
+        block_lines = []
+        started = False
+        if text:
+            yield classify_block(text)
+    text = "\n".join(block_lines).strip()
+    if text:
+        yield classify_block(text)
+
 def block_to_block_type(markdown_block: str) -> 'BlockType':
     lines = markdown_block.split("\n")
     if re.match(r"#{1,6} ", markdown_block):
@@ -227,30 +361,35 @@ def list_items_to_children(block: str, block_type: 'BlockType') -> list['ParentN
 
     return list_items
 
-def markdown_to_html_node(markdown: str) -> 'ParentNode':
+def markdown_block_to_html_node(block: 'MarkdownBlock') -> 'HTMLNode':
+    match block.block_type:
+        case BlockType.CODE:                                            # special case for CODE - no children
+            return ParentNode("pre", [ParentNode("code", [LeafNode(None, block.content)])])
+        case BlockType.ORDERED_LIST | BlockType.UNORDERED_LIST:
+            items = [ParentNode("li", block_to_children(item)) for item in block.content]
+            return ParentNode("ol" if block.block_type is BlockType.ORDERED_LIST else "ul", items)
+        case BlockType.HEADING:
+            return ParentNode(f"h{block.level}", block_to_children(block.content))
+        case BlockType.PARAGRAPH:
+            return ParentNode("p", block_to_children(block.content))
+        case BlockType.QUOTE:
+            return ParentNode("blockquote", block_to_children(block.content))
+        case _:
+            raise ValueError(f"Invalid block type: {block.block_type}")
+
+def block_to_html_node(block: str) -> 'HTMLNode':
+    return markdown_block_to_html_node(classify_block(block))
+
+def blocks_to_html_node(blocks: Iterable['MarkdownBlock']) -> 'ParentNode':
     nodes = []
-    blocks = markdown_to_blocks(markdown)                               # split markdown into blocks
     for block in blocks:                                                # loop over each block
-        block_type = block_to_block_type(block)                         # determine block type
-        if block_type is BlockType.CODE:                                # special case for CODE - no children
-            html_node = process_code(block)
-            nodes.append(html_node)
-            continue
-        if block_type is BlockType.ORDERED_LIST or block_type is BlockType.UNORDERED_LIST:
-            children = list_items_to_children(block, block_type)
-            if block_type is BlockType.ORDERED_LIST:
-                html_node = ParentNode("ol", children)
-            else:
-                html_node = ParentNode("ul", children)
-            nodes.append(html_node)
-            continue
-        stripped = strip_markdown_prefix(block, block_type)
-        children = block_to_children(stripped)                          # get child htmlnode objects from the block
-        html_node = block_to_html(block, children, block_type)          # create parent html node
-        nodes.append(html_node)
-
+        nodes.append(markdown_block_to_html_node(block))
     return ParentNode("div", nodes)                                     # return the final HTML node
 
+def markdown_to_html_node(markdown: str) -> 'ParentNode':
+    blocks = scan_blocks(markdown.split("\n"))                          # split markdown into typed blocks
+    return blocks_to_html_node(blocks)
+
 # COPY STATIC CONTENT
 def copy_dir(src: str, dst: str) -> None:
     # list the contents of the src dir and iterate over them
@@ -274,18 +413,19 @@ def copy_dir(src: str, dst: str) -> None:
         else:
             print(f"File type not supported. The source file is neither a regular file nor directory.")
 
-def copy_static_to_public(source: str, destination: str) -> None:
+def copy_static_to_public(source: str, destination: str, clean: bool = True) -> None:
     src = f"{source}"
     dst = f"{destination}"
-    # clean destination dir
-    try:
-        shutil.rmtree(dst)
-        print(f'Directory "{dst}" deleted successfully.')
-    except FileNotFoundError:
-        pass
+    # clean destination dir - incremental builds keep the generated pages around
+    if clean:
+        try:
+            shutil.rmtree(dst)
+            print(f'Directory "{dst}" deleted successfully.')
+        except FileNotFoundError:
+            pass
 
     # create dst dir
-    os.mkdir(dst)
+    os.makedirs(dst, exist_ok=True)
 
     # copy src content to dst
     copy_dir(src, dst)
@@ -299,50 +439,258 @@ def extract_title(markdown: str) -> str:
     title = lines[0][len(h1):].rstrip()
     return title
 
-def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str) -> None:
-    files = os.listdir(dir_path_content)
-    
-    for file in files:
-        file_path_src = os.path.join(dir_path_content, file)
-        file_path_dst = os.path.join(dest_dir_path, file)
-        
-        if os.path.isfile(file_path_src):
-            # Only process .md files
-            if not file.endswith('.md'):
+def rewrite_urls(node: 'HTMLNode', basepath: str, assets: dict[str, str] | None = None) -> None:
+    # prefix site-absolute href/src props of link and image nodes with the basepath,
+    # pointing static files at their fingerprinted names when assets is given
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.props:
+            for attribute in URL_ATTRIBUTES:
+                if attribute in current.props:
+                    current.props[attribute] = rewrite_url(current.props[attribute], basepath, assets)
+        if current.children:
+            stack.extend(current.children)
+
+def render_page(markdown: str, template: 'Template') -> str:
+    return "".join(iter_page(markdown, template))
+
+def iter_page(markdown: str, template: 'Template', cache: 'BlockCache | None' = None) -> Iterator[str]:
+    # Convert and extract
+    blocks = scan_blocks(markdown.split("\n"))
+    title = extract_title(markdown)
+
+    # Fill the template slots, rendering the content block by block as it is written
+    return template.iter_render({"Title": title, "Content": iter_template_blocks(blocks, template, cache)})
+
+def annotate_images(node: 'HTMLNode', images: dict[str, tuple[int, int]]) -> None:
+    # intrinsic size and lazy loading for img nodes; looked up by site URL, so run before rewrite_urls
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.tag == "img" and current.props is not None:
+            size = images.get(current.props.get("src", "").split("#", 1)[0].split("?", 1)[0])
+            if size is not None:
+                current.props["width"] = str(size[0])
+                current.props["height"] = str(size[1])
+            current.props["loading"] = "lazy"
+            current.props["decoding"] = "async"
+        if current.children:
+            stack.extend(current.children)
+
+def page_block_node(block: 'MarkdownBlock', basepath: str, assets: dict[str, str] | None = None,
+                    minify: bool = False, images: dict[str, tuple[int, int]] | None = None) -> 'HTMLNode':
+    # one block of a page: URLs rewritten and, with minify, text whitespace collapsed
+    html_node = markdown_block_to_html_node(block)
+    if images is not None:
+        annotate_images(html_node, images)
+    rewrite_urls(html_node, basepath, assets)
+    if minify:
+        minify_tree(html_node)
+    return html_node
+
+def render_block(block: 'MarkdownBlock', basepath: str, assets: dict[str, str] | None = None,
+                 minify: bool = False, images: dict[str, tuple[int, int]] | None = None) -> str:
+    return page_block_node(block, basepath, assets, minify, images).to_html()
+
+def iter_template_blocks(blocks: Iterable['MarkdownBlock'], template: 'Template',
+                         cache: 'BlockCache | None' = None) -> Iterator[str]:
+    # the page content rendered the way the template was compiled
+    return iter_blocks_html(blocks, template.basepath, cache, template.assets, template.minify,
+                            template.images, template.render_context())
+
+def iter_blocks_html(blocks: Iterable['MarkdownBlock'], basepath: str, cache: 'BlockCache | None' = None,
+                     assets: dict[str, str] | None = None, minify: bool = False,
+                     images: dict[str, tuple[int, int]] | None = None, context: str | None = None) -> Iterator[str]:
+    # render each block as soon as it is complete; same output as markdown_to_html_node
+    yield "<div>"
+    if context is None:
+        context = basepath
+    for block in blocks:
+        if cache is None:
+            yield from page_block_node(block, basepath, assets, minify, images).iter_html()
+            continue
+        # unchanged blocks are spliced in from the cache instead of being re-rendered
+        key = cache.key(block.text, block.block_type, context)
+        html = cache.get(key)
+        if html is None:
+            html = render_block(block, basepath, assets, minify, images)
+            cache.put(key, html)
+        yield html
+    yield "</div>"
+
+def stream_page(from_path: str, template: 'Template', dest_path: str, cache: 'BlockCache | None' = None,
+                sink: 'OutputSink' = DISK) -> tuple[str, int, int]:
+    # returns the (sha256, mtime_ns, size) of the source as it was read, for the manifest
+    with open(from_path, "rb") as raw:
+        stat = os.fstat(raw.fileno())
+        reader = HashingReader(raw)
+        md = io.TextIOWrapper(io.BufferedReader(reader))
+        # the title is the first line, so it is known before any content is written
+        first_line = md.readline()
+        title = extract_title(first_line)
+        blocks = scan_blocks(itertools.chain([first_line], md))
+        content = iter_template_blocks(blocks, template, cache)
+        fragments = template.iter_render({"Title": title, "Content": content})
+
+        with sink.open(dest_path) as f:
+            f.writelines(fragments)
+        return reader.hexdigest(), stat.st_mtime_ns, stat.st_size
+
+def write_page(from_path: str, template: 'Template', dest_path: str,
+               stream_threshold: int = STREAM_THRESHOLD, block_cache: str | None = None,
+               sink: 'OutputSink' = DISK) -> tuple[str, int, int]:
+    # returns the (sha256, mtime_ns, size) of the source the page was rendered from
+    cache = open_block_cache(block_cache) if block_cache else None
+
+    # very large sources are parsed and rendered block by block
+    if os.path.getsize(from_path) > stream_threshold:
+        source_snapshot = stream_page(from_path, template, dest_path, cache, sink)
+    else:
+        source_snapshot = write_whole_page(from_path, template, dest_path, cache, sink)
+
+    if cache is not None:
+        cache.flush()
+    return source_snapshot
+
+def render_page_bytes(from_path: str, template: 'Template', dest_path: str,
+                      stream_threshold: int = STREAM_THRESHOLD,
+                      block_cache: str | None = None) -> tuple[bytes, tuple[str, int, int]]:
+    # for worker processes building into a sink they cannot reach; the parent stores the bytes
+    memory = MemorySink()
+    source_snapshot = write_page(from_path, template, dest_path, stream_threshold, block_cache, memory)
+    return memory.read(dest_path), source_snapshot
+
+def write_whole_page(from_path: str, template: 'Template', dest_path: str, cache: 'BlockCache | None' = None,
+                     sink: 'OutputSink' = DISK) -> tuple[str, int, int]:
+    # Read markdown, stat'ed and hashed from the same bytes that are rendered
+    with open(from_path, "rb") as md:
+        # stat'ed before the read: an edit landing in between gets a newer mtime than recorded
+        stat = os.fstat(md.fileno())
+        data = md.read()
+    markdown = decode_source(data)
+
+    fragments = iter_page(markdown, template, cache)
+
+    # Stream HTML to the sink without building the whole page in memory
+    with sink.open(dest_path) as f:
+        f.writelines(fragments)
+    return snapshot(data, stat)
+
+def generate_page(from_path: str, template_path: str, dest_path: str, basepath: str) -> None:
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    write_page(from_path, Template.from_file(template_path, basepath), dest_path)
+
+def discover_pages(dir_path_content: str, dest_dir_path: str,
+                   inventory: 'Inventory | None' = None) -> list[tuple[str, str]]:
+    # the inventory lists the content tree in sorted order so builds (and their logs) are deterministic
+    if inventory is None:
+        inventory = scan_tree(dir_path_content, {})
+    return [(source, page_output_path(source, dir_path_content, dest_dir_path))
+            for source in inventory.matching('.md')]
+
+def page_output_path(source: str, dir_path_content: str, dest_dir_path: str) -> str:
+    # content/blog/tom/index.md -> docs/blog/tom/index.html, as discover_pages maps it
+    file_path_dst = os.path.join(dest_dir_path, os.path.relpath(source, dir_path_content))
+    return os.path.splitext(file_path_dst)[0] + '.html'
+
+def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str,
+                             manifest: 'BuildManifest | None' = None, jobs: int = 1,
+                             profiler: 'BuildProfiler | None' = None,
+                             stream_threshold: int = STREAM_THRESHOLD, block_cache: str | None = None,
+                             sink: 'OutputSink' = DISK, assets: dict[str, str] | None = None,
+                             minify: bool = False, images: dict[str, tuple[int, int]] | None = None) -> None:
+    pages = discover_pages(dir_path_content, dest_dir_path)
+    generate_pages(pages, template_path, basepath, manifest, jobs, profiler, stream_threshold, block_cache, sink,
+                   assets, minify, images)
+
+def generate_pages(pages: list[tuple[str, str]], template_path: str, basepath: str,
+                   manifest: 'BuildManifest | None' = None, jobs: int = 1,
+                   profiler: 'BuildProfiler | None' = None,
+                   stream_threshold: int = STREAM_THRESHOLD, block_cache: str | None = None,
+                   sink: 'OutputSink' = DISK, assets: dict[str, str] | None = None,
+                   minify: bool = False, images: dict[str, tuple[int, int]] | None = None,
+                   template: 'Template | None' = None) -> None:
+    # read and compile the template once for the whole build, unless the caller kept one compiled
+    # from template_path with the same basepath and options
+    if template is None:
+        template = Template.from_file(template_path, basepath, assets, minify, images)
+
+    # Skip pages whose source, template and basepath match the last build
+    template_hash = None
+    if manifest is not None:
+        # compile options (fingerprints, minify, image sizes) change every page, as does a new
+        # fingerprint for a file the template links
+        template_hash = template.output_hash(manifest.template_hash(template_path))
+        stale_pages = []
+        for file_path_src, file_path_dst in pages:
+            if manifest.is_fresh(file_path_src, file_path_dst, template_hash, basepath):
+                print(f"Skipping unchanged page {file_path_src}")
                 continue
-            
-            # Change .md to .html for destination
-            file_path_dst = file_path_dst.replace('.md', '.html')
-            
+            stale_pages.append((file_path_src, file_path_dst))
+        pages = stale_pages
+
+    # the profiler measures each page in this process, so profiled builds run serially
+    if profiler is None:
+        page_writer = functools.partial(write_page, stream_threshold=stream_threshold, block_cache=block_cache,
+                                        sink=sink)
+    else:
+        page_writer = functools.partial(profiler.write_page, sink=sink)
+
+    if jobs > 1 and len(pages) > 1 and profiler is None:
+        # render in worker processes; map() yields in submission order so the log stays deterministic
+        sources = [src for src, _ in pages]
+        destinations = [dst for _, dst in pages]
+        chunksize = max(1, len(pages) // (jobs * 4))
+        if not sink.shared:
+            # workers cannot write into this sink, they send the rendered bytes back instead
+            page_writer = functools.partial(render_page_bytes, stream_threshold=stream_threshold,
+                                            block_cache=block_cache)
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(page_writer, sources, [template] * len(pages), destinations,
+                                   chunksize=chunksize)
+            for file_path_src, file_path_dst, result in zip(sources, destinations, results):
+                print(f"Generating page from {file_path_src} to {file_path_dst} using {template_path}")
+                if not sink.shared:
+                    html, result = result
+                    sink.write_bytes(file_path_dst, html)
+                if manifest is not None:
+                    # the workers report what they read, the source may have changed since
+                    manifest.record_page(file_path_src, file_path_dst, template_hash, basepath,
+                                         source_snapshot=result)
+        return
+
+    if profiler is None:
+        pipeline_pages(pages, template, template_path, basepath, manifest, template_hash, stream_threshold,
+                       block_cache, sink)
+        return
+
+    for file_path_src, file_path_dst in pages:
+        print(f"Generating page from {file_path_src} to {file_path_dst} using {template_path}")
+        source_snapshot = page_writer(file_path_src, template, file_path_dst)
+        if manifest is not None:
+            manifest.record_page(file_path_src, file_path_dst, template_hash, basepath,
+                                 source_snapshot=source_snapshot)
+
+def pipeline_pages(pages: list[tuple[str, str]], template: 'Template', template_path: str, basepath: str,
+                   manifest: 'BuildManifest | None' = None, template_hash: str | None = None,
+                   stream_threshold: int = STREAM_THRESHOLD, block_cache: str | None = None,
+                   sink: 'OutputSink' = DISK) -> None:
+    # serial build with the I/O overlapped: sources are read ahead by a thread pool and
+    # finished pages are written by a background thread while the next one renders
+    cache = open_block_cache(block_cache) if block_cache else None
+    with AsyncWriter(sink) as writer:
+        for file_path_src, file_path_dst, data, stat in prefetch(pages, stream_threshold):
             print(f"Generating page from {file_path_src} to {file_path_dst} using {template_path}")
-            
-            # Read markdown
-            with open(file_path_src, "r") as md:
-                markdown = md.read()
-            
-            # Read template
-            with open(template_path, "r") as tp:
-                template = tp.read()
-            
-            # Convert and extract
-            html_node = markdown_to_html_node(markdown)
-            content = html_node.to_html()
-            title = extract_title(markdown)
-            
-            # Replace placeholders
-            template = template.replace("{{ Title }}", title)
-            template = template.replace("{{ Content }}", content)
-            template = template.replace('href="/', f'href="{basepath}/')
-            template = template.replace('src="/', f'src="{basepath}/')
-            
-            # Create destination directory
-            dest_dir = os.path.dirname(file_path_dst)
-            os.makedirs(dest_dir, exist_ok=True)
-            
-            # Write HTML
-            with open(file_path_dst, "w") as html:
-                html.write(template)
-                
-        elif os.path.isdir(file_path_src):
-            # Recurse into subdirectory
-            generate_pages_recursive(file_path_src, template_path, file_path_dst, basepath)
+            if data is None:
+                # too large to hold in memory, parsed and written block by block as before
+                source_snapshot = stream_page(file_path_src, template, file_path_dst, cache, sink)
+            else:
+                # hashed and stat'ed as prefetched, an edit made since is picked up next build
+                source_snapshot = snapshot(data, stat)
+                writer.write_page(file_path_dst, iter_page(decode_source(data), template, cache))
+            if manifest is not None:
+                manifest.record_page(file_path_src, file_path_dst, template_hash, basepath, data,
+                                     source_snapshot)
+    if cache is not None:
+        cache.flush()
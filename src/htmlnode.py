@@ -1,13 +1,27 @@
+import sys
+from typing import Iterator, TextIO
+
 class HTMLNode:
+    # slots instead of a per-instance __dict__; subclasses add no attributes
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag: str | None = None, value: str | None = None, 
                  children: list['HTMLNode'] | None = None, props: dict[str, str] | None = None) -> None:
-        self.tag = tag
+        # interned so every node shares one string per tag name ("h2" etc. are built at runtime)
+        self.tag = sys.intern(tag) if isinstance(tag, str) else tag
         self.value = value
         self.children = children
         self.props = props
     
     def to_html(self) -> str:
         raise NotImplementedError
+
+    def iter_html(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def write_html(self, fp: TextIO) -> None:
+        # stream the serialized fragments straight into an open file or buffer
+        fp.writelines(self.iter_html())
     
     def props_to_html(self) -> str:
         if self.props is None:
@@ -32,6 +46,8 @@ class HTMLNode:
                 )
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str | None, value: str, props: dict[str, str] | None = None) -> None:
         super().__init__(tag, value, None, props)
 
@@ -45,22 +61,43 @@ class LeafNode(HTMLNode):
         html_props = self.props_to_html()
         return f"<{self.tag}{html_props}>{self.value}</{self.tag}>"
 
+    def iter_html(self) -> Iterator[str]:
+        yield self.to_html()
+
     def __repr__(self) -> str:
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list['HTMLNode'], props: dict[str,  str] | None = None) -> None:
         super().__init__(tag, None, children, props)
 
-    def to_html(self) -> str:
+    def validate(self) -> None:
         if self.tag is None:
             raise ValueError("Missing tag.")
 
         if self.children is None:
             raise ValueError("Children argument missing.")
 
-        output_html_string = ""
-        for child in self.children:
-            output_html_string += child.to_html()
+    def to_html(self) -> str:
+        return "".join(self.iter_html())
 
-        return f"<{self.tag}>{output_html_string}</{self.tag}>"
+    def iter_html(self) -> Iterator[str]:
+        # walk the tree with an explicit stack instead of recursing, so each
+        # fragment is yielded once rather than being re-copied at every level
+        self.validate()
+        yield f"<{self.tag}{self.props_to_html()}>"
+        stack = [(self, iter(self.children))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    child.validate()
+                    yield f"<{child.tag}{child.props_to_html()}>"
+                    stack.append((child, iter(child.children)))
+                    break
+                yield from child.iter_html()
+            else:
+                stack.pop()
+                yield f"</{node.tag}>"
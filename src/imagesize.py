@@ -0,0 +1,122 @@
+import os
+import re
+import struct
+
+IMAGE_EXTENSIONS = (".png", ".gif", ".jpg", ".jpeg", ".webp", ".svg")
+# JPEG start-of-frame markers (baseline, progressive, ...) carry the dimensions; C4, C8 and CC do not
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+SVG_ROOT_PATTERN = re.compile(rb"<svg\b[^>]*>", re.DOTALL)
+SVG_LENGTH_PATTERN = re.compile(rb'\b(width|height|viewBox)\s*=\s*["\']([^"\']*)["\']')
+
+def png_size(f) -> tuple[int, int] | None:
+    header = f.read(24)
+    if len(header) < 24 or header[:8] != b"\x89PNG\r\n\x1a\n" or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+def gif_size(f) -> tuple[int, int] | None:
+    header = f.read(10)
+    if len(header) < 10 or header[:6] not in (b"GIF87a", b"GIF89a"):
+        return None
+    return struct.unpack("<HH", header[6:10])
+
+def jpeg_size(f) -> tuple[int, int] | None:
+    if f.read(2) != b"\xff\xd8":
+        return None
+    # walk the segment headers, seeking past each payload, until a frame header
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0xFF:
+            # fill byte, the marker code follows
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if marker[1] in (0x01, *range(0xD0, 0xD8)):
+            # standalone markers without a length
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        (length,) = struct.unpack(">H", length)
+        if marker[1] in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+def webp_size(f) -> tuple[int, int] | None:
+    header = f.read(30)
+    if len(header) < 30 or header[:4] != b"RIFF" or header[8:12] != b"WEBP":
+        return None
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(header[24:27], "little") + 1, int.from_bytes(header[27:30], "little") + 1
+    return None
+
+def svg_size(f) -> tuple[int, int] | None:
+    # only the root element is read; sizes in units other than px are left to the browser
+    match = SVG_ROOT_PATTERN.search(f.read(4096))
+    if match is None:
+        return None
+    attributes = {name.decode(): value.decode().strip() for name, value in SVG_LENGTH_PATTERN.findall(match.group(0))}
+    try:
+        if "width" in attributes and "height" in attributes:
+            return (round(float(attributes["width"].removesuffix("px"))),
+                    round(float(attributes["height"].removesuffix("px"))))
+        if "viewBox" in attributes:
+            _, _, width, height = (float(part) for part in attributes["viewBox"].replace(",", " ").split())
+            return round(width), round(height)
+    except ValueError:
+        return None
+    return None
+
+READERS = {
+    ".png": png_size,
+    ".gif": gif_size,
+    ".jpg": jpeg_size,
+    ".jpeg": jpeg_size,
+    ".webp": webp_size,
+    ".svg": svg_size,
+}
+
+def read_image_size(path: str) -> tuple[int, int] | None:
+    # (width, height) from the file header, without decoding any pixels
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        return None
+    with open(path, "rb") as f:
+        try:
+            return reader(f)
+        except (OSError, struct.error):
+            return None
+
+def image_dimensions(static_dir: str, hashes: dict[str, str], cache: dict[str, list | None]) -> dict[str, tuple[int, int]]:
+    """Map the site URL of every image under static_dir to its (width, height).
+
+    hashes maps site URLs to content hashes (see assets.hash_static_files).
+    Sizes are cached by hash, so an unchanged image is never opened again;
+    hashes no longer in use are dropped from the cache.
+    """
+    dimensions = {}
+    used = set()
+    for url, digest in hashes.items():
+        if not url.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        if digest not in cache:
+            size = read_image_size(os.path.join(static_dir, url.lstrip("/")))
+            cache[digest] = list(size) if size else None
+        used.add(digest)
+        if cache[digest]:
+            dimensions[url] = tuple(cache[digest])
+    for digest in set(cache) - used:
+        del cache[digest]
+    return dimensions
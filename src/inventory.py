@@ -0,0 +1,91 @@
+import os
+import time
+
+# a directory modified this recently may change again within the same mtime tick,
+# so its listing is not trusted on the next build
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+def stat_signature(path: str) -> tuple[int, int] | None:
+    # (mtime_ns, size), or None for a missing file; what cached results are checked against
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class Inventory:
+    """Flat listing of a source tree, read with os.scandir.
+
+    files maps every file path to its (mtime_ns, size), in the order
+    discover_pages has always walked the tree: names sorted within each
+    directory, subdirectories expanded where they sort. dirs lists every
+    directory, the root first.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.files = {}
+        self.dirs = []
+
+    def matching(self, suffix: str) -> list[str]:
+        return [path for path in self.files if path.endswith(suffix)]
+
+def scan_tree(root: str, recorded: dict[str, dict]) -> 'Inventory':
+    """List every file under root with its mtime and size.
+
+    recorded holds the listing of each directory from earlier scans, keyed by
+    path, with the directory mtime it was read at. A directory whose mtime is
+    unchanged has had no entries added, removed or renamed, so its listing is
+    reused and only its files are stat'ed (edits in place do not touch the
+    directory mtime); other directories are read again. Directories that no
+    longer exist are dropped from recorded.
+    """
+    inventory = Inventory(root)
+    scanned = set()
+    trusted_before = time.time_ns() - RACY_WINDOW_NS
+
+    def scan(directory: str, mtime_ns: int) -> None:
+        inventory.dirs.append(directory)
+        scanned.add(directory)
+        entry = recorded.get(directory)
+        names = None
+        if entry is not None and entry["mtime_ns"] == mtime_ns:
+            names = {}
+            try:
+                for name in entry["files"]:
+                    stat = os.stat(os.path.join(directory, name))
+                    names[name] = (stat.st_mtime_ns, stat.st_size)
+                for name in entry["dirs"]:
+                    names[name] = os.stat(os.path.join(directory, name)).st_mtime_ns
+            except FileNotFoundError:
+                # raced with a change after all, read the directory again
+                names = None
+        if names is None:
+            names = {}
+            with os.scandir(directory) as entries:
+                for dir_entry in entries:
+                    # like os.path.isfile / isdir, symlinks are followed
+                    if dir_entry.is_file():
+                        stat = dir_entry.stat()
+                        names[dir_entry.name] = (stat.st_mtime_ns, stat.st_size)
+                    elif dir_entry.is_dir():
+                        names[dir_entry.name] = dir_entry.stat().st_mtime_ns
+            recorded[directory] = {
+                "mtime_ns": mtime_ns if mtime_ns < trusted_before else None,
+                "files": sorted(name for name, value in names.items() if isinstance(value, tuple)),
+                "dirs": sorted(name for name, value in names.items() if not isinstance(value, tuple)),
+            }
+
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            if isinstance(names[name], tuple):
+                inventory.files[path] = names[name]
+            else:
+                scan(path, names[name])
+
+    scan(root, os.stat(root).st_mtime_ns)
+    prefix = root.rstrip(os.sep) + os.sep
+    for directory in [path for path in recorded if path == root or path.startswith(prefix)]:
+        if directory not in scanned:
+            del recorded[directory]
+    return inventory
@@ -1,17 +1,176 @@
 from textnode import TextNode,TextType
-from functions import copy_static_to_public, generate_pages_recursive
+from functions import STREAM_THRESHOLD
+from profiling import BuildProfiler
+from blockcache import DEFAULT_MAX_BYTES
+from build import SiteBuilder
+from watch import watch
+from serve import PreviewSite, serve
+from sink import MemorySink
+from compress import MIN_SIZE
+from shard import parse_shard, merge_shards
+from daemon import BuildDaemon, serve_daemon, SOCKET_PATH
+import argparse
+import glob
+import os
 import sys
 
+MANIFEST_PATH = ".build/manifest.json"
+PROFILE_PATH = ".build/profile.json"
+BLOCK_CACHE_PATH = ".build/blocks.sqlite"
+SHARDS_DIR = "shards"
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate the static site from content/ into docs/.")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served under")
+    parser.add_argument("--full", action="store_true", help="wipe docs/ and rebuild every page")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="render pages in N worker processes (0 uses every CPU)")
+    parser.add_argument("--checksum", action="store_true",
+                        help="compare static files by content hash instead of size and mtime")
+    parser.add_argument("--hardlink", action="store_true",
+                        help="hardlink static files into docs/ instead of copying them")
+    parser.add_argument("--stream", action="store_true",
+                        help="parse and render every page block by block instead of only very large ones")
+    parser.add_argument("--no-block-cache", action="store_true",
+                        help="re-render every block instead of reusing fragments from earlier builds")
+    parser.add_argument("--block-cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), metavar="MB",
+                        help="evict least recently used fragments once the block cache exceeds this size")
+    parser.add_argument("--explain", metavar="PAGE",
+                        help="show what PAGE (source, output path or URL) depends on and whether it would rebuild")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_PATH, metavar="REPORT",
+                        help=f"record per-page stage timings and memory (report defaults to {PROFILE_PATH}); "
+                             "pages are rendered serially and whole, without the block cache, streaming "
+                             "or overlapped I/O, so times are per stage rather than those of a normal build")
+    parser.add_argument("--watch", action="store_true",
+                        help="after building, stay running and rebuild affected pages whenever sources change")
+    parser.add_argument("--poll", action="store_true",
+                        help="with --watch, poll for changes instead of using inotify")
+    parser.add_argument("--serve", action="store_true",
+                        help="serve the site, rendered from content/ on request, instead of building docs/")
+    parser.add_argument("--host", default="127.0.0.1", help="address for --serve to listen on")
+    parser.add_argument("--port", type=int, default=8888, help="port for --serve to listen on")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="copy static files under content-hashed names (index.<hash>.css) and link to those")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz (and .br when brotli is installed) siblings for text files in docs/")
+    parser.add_argument("--precompress-min-size", type=int, default=MIN_SIZE, metavar="BYTES",
+                        help="leave files smaller than this uncompressed")
+    parser.add_argument("--minify", action="store_true",
+                        help="write pages without the template's indentation and with collapsed whitespace; "
+                             "code blocks are kept exactly")
+    parser.add_argument("--no-image-sizes", action="store_true",
+                        help="do not add width/height and lazy loading attributes to page images")
+    parser.add_argument("--archive", metavar="PATH",
+                        help="render the site in memory and write it as one .tar or .tar.gz instead of into docs/")
+    parser.add_argument("--target", action="append", default=[], metavar="BASEPATH=DIR",
+                        help="also build the site for BASEPATH into DIR, from the same rendering (repeatable)")
+    parser.add_argument("--shard", metavar="I/N",
+                        help=f"build only shard I of N (numbered from 0) into {SHARDS_DIR}/I-of-N/; "
+                             f"combine the shards with 'main.py merge'")
+    parser.add_argument("--daemon", action="store_true",
+                        help=f"keep running and serve builds from src/client.py over {SOCKET_PATH}")
+    parser.add_argument("--top", type=int, default=10, help="slowest pages to list with --profile")
+    args = parser.parse_args(argv)
+
+    if args.shard is not None:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(f"--shard: {e}")
+        if args.target or args.watch or args.serve or args.archive:
+            parser.error("--shard cannot be combined with --target, --watch, --serve or --archive")
+
+    targets = []
+    for spec in args.target:
+        basepath, separator, dest_dir = spec.partition("=")
+        if not separator or not dest_dir:
+            parser.error(f"--target expects BASEPATH=DIR, got {spec!r}")
+        targets.append((basepath, os.path.normpath(dest_dir)))
+    dest_dirs = ["docs", *(dest_dir for _, dest_dir in targets)]
+    if len(set(dest_dirs)) != len(dest_dirs):
+        parser.error("every --target needs its own directory, distinct from docs/")
+    if targets and (args.serve or args.archive):
+        parser.error("--target cannot be combined with --serve or --archive")
+    args.target = targets
+    return args
+
+def make_builder(args: argparse.Namespace, profiler: 'BuildProfiler | None' = None) -> SiteBuilder:
+    jobs = args.jobs or os.cpu_count() or 1
+    dest_dir, manifest_path = "docs", MANIFEST_PATH
+    if args.shard is not None:
+        # shards of one build may run on one machine, so each gets its own output and manifest
+        dest_dir = os.path.join(SHARDS_DIR, "{}-of-{}".format(*args.shard))
+        manifest_path = os.path.join(os.path.dirname(MANIFEST_PATH), "shard-{}-of-{}.json".format(*args.shard))
+    return SiteBuilder("content", "static", "template.html", dest_dir, args.basepath, manifest_path, jobs,
+                       checksum=args.checksum, hardlink=args.hardlink,
+                       stream_threshold=0 if args.stream else STREAM_THRESHOLD,
+                       block_cache=None if args.no_block_cache else BLOCK_CACHE_PATH,
+                       block_cache_bytes=args.block_cache_size * 1024 * 1024, profiler=profiler,
+                       fingerprint=args.fingerprint, precompress=args.precompress,
+                       precompress_min_size=args.precompress_min_size, minify=args.minify,
+                       image_sizes=not args.no_image_sizes, targets=args.target, shard=args.shard)
+
+def parse_merge_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="main.py merge",
+                                     description="Assemble the outputs of a sharded build into docs/.")
+    parser.add_argument("shards", nargs="*", help=f"shard output directories (default: every {SHARDS_DIR}/*/)")
+    parser.add_argument("--hardlink", action="store_true", help="hardlink files into docs/ instead of copying them")
+    args = parser.parse_args(argv)
+    args.shards = [os.path.normpath(path) for path in args.shards or sorted(glob.glob(os.path.join(SHARDS_DIR, "*", "")))]
+    if not args.shards:
+        parser.error(f"no shard directories given and none found in {SHARDS_DIR}/")
+    return args
+
+def merge(argv: list[str]) -> None:
+    args = parse_merge_args(argv)
+    try:
+        count = merge_shards(args.shards, "docs", args.hardlink)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"Merged {count} files from {len(args.shards)} shards into docs")
+
 def main():
 
-    if len(sys.argv) < 2:
-        basepath = "/"
-    else:
-        basepath = sys.argv[1]
+    if sys.argv[1:2] == ["merge"]:
+        merge(sys.argv[2:])
+        return
+
+    args = parse_args()
+    basepath = args.basepath
+
+    if args.explain:
+        print(make_builder(args).explain(args.explain))
+        return
+
+    if args.serve:
+        serve(PreviewSite("content", "static", "template.html", basepath), args.host, args.port)
+        return
+
+    if args.daemon:
+        serve_daemon(BuildDaemon(parse_args, make_builder))
+        return
+
+    profiler = BuildProfiler() if args.profile else None
+    builder = make_builder(args, profiler)
+    if args.archive:
+        sink = MemorySink()
+        builder.render(sink)
+        count = sink.write_tar(args.archive, builder.dest_dir)
+        print(f"Wrote {count} files to {args.archive}")
+        return
+
+    builder.build(full=args.full)
 
-    copy_static_to_public("static", "docs")
+    if profiler is not None:
+        profiler.stop()
+        profiler.write_report(args.profile, args.top)
+        print(profiler.summary(args.top))
+        print(f"Profile written to {args.profile}")
+        # later rebuilds are not profiled
+        builder.profiler = None
 
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    if args.watch:
+        watch(builder, polling=args.poll)
 
 if __name__ == "__main__":
     main()
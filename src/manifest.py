@@ -0,0 +1,215 @@
+import hashlib
+import io
+import json
+import os
+
+from pipeline import decode_source
+
+MANIFEST_VERSION = 1
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class HashingReader(io.RawIOBase):
+    """Binary file that hashes every byte read through it.
+
+    Wrapped in a TextIOWrapper, a page can be parsed as it streams in while
+    the hash describes exactly the bytes that were rendered.
+    """
+
+    def __init__(self, raw) -> None:
+        self.raw = raw
+        self.digest = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self.raw.readinto(buffer)
+        if count:
+            self.digest.update(memoryview(buffer)[:count])
+        return count
+
+    def hexdigest(self) -> str:
+        # anything the reader did not get to still belongs to the source
+        for chunk in iter(lambda: self.raw.read(1 << 16), b""):
+            self.digest.update(chunk)
+        return self.digest.hexdigest()
+
+def snapshot(data: bytes, stat: os.stat_result) -> tuple[str, int, int]:
+    # (sha256, mtime_ns, size) of a source, taken when it was read
+    return hashlib.sha256(data).hexdigest(), stat.st_mtime_ns, stat.st_size
+
+class BuildManifest:
+    """Persistent record of what the previous build produced.
+
+    For every page it stores the source hash (plus mtime/size so unchanged files
+    are not even re-read), the template hash, the basepath and the output path.
+    Static files copied by the asset sync are tracked under "assets", their
+    content hashes under "static_hashes" and the intrinsic sizes of images,
+    keyed by content hash, under "image_sizes". The .gz/.br siblings written
+    by --precompress are listed under "compressed". The directory listings of
+    the source trees are kept under "directories" (see inventory.scan_tree),
+    and file_stats holds the stat results of the current scan. With a
+    resolver attached, each page also records the pages it links to and the
+    images it embeds, and goes stale when any of those change.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.pages = {}
+        self.assets = {}
+        self.static_hashes = {}
+        self.image_sizes = {}
+        self.directories = {}
+        self.compressed = []
+        self.seen = set()
+        self.file_stats = {}
+        self.resolver = None
+        self._template_hashes = {}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self.pages = data.get("pages", {})
+        self.assets = data.get("assets", {})
+        self.static_hashes = data.get("static_hashes", {})
+        self.image_sizes = data.get("image_sizes", {})
+        self.directories = data.get("directories", {})
+        self.compressed = data.get("compressed", [])
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {"version": MANIFEST_VERSION, "pages": self.pages, "assets": self.assets,
+                "static_hashes": self.static_hashes, "image_sizes": self.image_sizes, "directories": self.directories,
+                "compressed": self.compressed}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        self.pages = {}
+        self.assets = {}
+        self.static_hashes = {}
+        self.image_sizes = {}
+        self.directories = {}
+        self.compressed = []
+        self.seen = set()
+        self.file_stats = {}
+
+    def start_build(self) -> None:
+        # forget per-build memos so a long-running process sees fresh file state
+        self.seen = set()
+        self.file_stats = {}
+        self._template_hashes = {}
+        if self.resolver is not None:
+            self.resolver.clear_cache()
+
+    def template_hash(self, template_path: str) -> str:
+        # the template is shared by every page, hash it once per build
+        if template_path not in self._template_hashes:
+            self._template_hashes[template_path] = hash_file(template_path)
+        return self._template_hashes[template_path]
+
+    def is_fresh(self, source: str, output: str, template_hash: str, basepath: str) -> bool:
+        self.seen.add(source)
+        return not self.stale_reasons(source, output, template_hash, basepath)
+
+    def stale_reasons(self, source: str, output: str, template_hash: str, basepath: str) -> list[str]:
+        entry = self.pages.get(source)
+        if entry is None:
+            return ["not built before"]
+        reasons = []
+        if entry["output"] != output:
+            reasons.append(f"output moved from {entry['output']}")
+        if entry["template"] != template_hash:
+            reasons.append("template changed")
+        if entry["basepath"] != basepath:
+            reasons.append(f"basepath changed from {entry['basepath']!r}")
+        if not os.path.exists(output):
+            reasons.append("output missing")
+        # the inventory already stat'ed every source it listed
+        if source in self.file_stats:
+            mtime_ns, size = self.file_stats[source]
+        elif os.path.exists(source):
+            stat = os.stat(source)
+            mtime_ns, size = stat.st_mtime_ns, stat.st_size
+        else:
+            return reasons + ["source missing"]
+
+        # same mtime and size -> trust the recorded hash without reading the file
+        if mtime_ns != entry["mtime_ns"] or size != entry["size"]:
+            # touched but maybe not changed - compare content hashes
+            if hash_file(source) != entry["source"]:
+                reasons.append("source changed")
+            elif not reasons:
+                entry["mtime_ns"] = mtime_ns
+                entry["size"] = size
+
+        # linked pages and embedded images recorded by the dependency graph
+        if self.resolver is not None and "dependencies" in entry:
+            reasons.extend(self.resolver.changes(entry["dependencies"]))
+        return reasons
+
+    def record_page(self, source: str, output: str, template_hash: str, basepath: str,
+                    data: bytes | None = None, source_snapshot: tuple[str, int, int] | None = None) -> None:
+        # source_snapshot is the (sha256, mtime_ns, size) the page was rendered from, so an edit made
+        # while it rendered is not recorded as built; data is the source as already read by the build
+        self.seen.add(source)
+        if source_snapshot is None:
+            stat = os.stat(source)
+            source_snapshot = (hash_file(source), stat.st_mtime_ns, stat.st_size)
+        digest, mtime_ns, size = source_snapshot
+        entry = {
+            "source": digest,
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "template": template_hash,
+            "basepath": basepath,
+            "output": output,
+        }
+        if self.resolver is not None:
+            if data is not None:
+                entry["dependencies"] = self.resolver.page_dependencies(decode_source(data).splitlines(keepends=True))
+            else:
+                with open(source, "r") as md:
+                    entry["dependencies"] = self.resolver.page_dependencies(md)
+        self.pages[source] = entry
+
+    def remove_page(self, source: str) -> str | None:
+        # forget a page and delete its output; returns the removed output path
+        entry = self.pages.pop(source, None)
+        if entry is None:
+            return None
+        output = entry["output"]
+        if not os.path.isfile(output):
+            return None
+        os.remove(output)
+        # pages live in their own directory, drop it once it is empty
+        try:
+            os.rmdir(os.path.dirname(output))
+        except OSError:
+            pass
+        return output
+
+    def prune(self) -> list[str]:
+        # drop entries whose source was not visited in this build and delete their outputs
+        removed = []
+        for source in sorted(set(self.pages) - self.seen):
+            output = self.remove_page(source)
+            if output is not None:
+                removed.append(output)
+        return removed
@@ -0,0 +1,69 @@
+import re
+
+from htmlnode import LeafNode
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# elements whose text is shown as written; never touched
+PRESERVED_PATTERN = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2>)", re.DOTALL | re.IGNORECASE)
+COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+BETWEEN_TAGS_PATTERN = re.compile(r">\s+<")
+SELF_CLOSING_PATTERN = re.compile(r"\s*/>")
+VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"))
+BLOCK_TAGS = frozenset(("p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote"))
+
+class VoidNode(LeafNode):
+    """An element without content or end tag, e.g. <img src="..." alt="...">."""
+
+    __slots__ = ()
+
+    def __init__(self, tag: str, props: dict[str, str] | None = None) -> None:
+        super().__init__(tag, "", props)
+
+    def to_html(self) -> str:
+        return f"<{self.tag}{self.props_to_html()}>"
+
+def minify_markup(html: str) -> str:
+    # for the template source: drop comments, indentation and "/>" outside preformatted elements
+    parts = PRESERVED_PATTERN.split(html)
+    minified = []
+    # split() with two groups yields: text, whole preserved element, its tag name, text, ...
+    for index in range(0, len(parts), 3):
+        text = COMMENT_PATTERN.sub("", parts[index])
+        # preserved elements are tags too, so whitespace between them and a neighbouring tag goes
+        if index > 0 and text.lstrip().startswith("<"):
+            text = text.lstrip()
+        if index + 1 < len(parts) and text.rstrip().endswith(">"):
+            text = text.rstrip()
+        text = BETWEEN_TAGS_PATTERN.sub("><", text)
+        text = SELF_CLOSING_PATTERN.sub(">", text)
+        minified.append(WHITESPACE_PATTERN.sub(" ", text))
+        if index + 1 < len(parts):
+            minified.append(parts[index + 1])
+    return "".join(minified).strip()
+
+def minify_tree(node: 'HTMLNode') -> None:
+    """Collapse whitespace in the text of a rendered page tree, in place.
+
+    Code (inline and <pre><code> blocks) is left exactly as written. Void
+    elements lose their end tag, and text at the edges of block elements is
+    trimmed.
+    """
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        children = current.children
+        if not children or current.tag in ("pre", "code"):
+            continue
+        for index, child in enumerate(children):
+            if child.children is not None:
+                stack.append(child)
+            elif child.tag in VOID_TAGS:
+                children[index] = VoidNode(child.tag, child.props)
+            elif child.tag != "code" and child.value:
+                child.value = WHITESPACE_PATTERN.sub(" ", child.value)
+        if current.tag in BLOCK_TAGS:
+            first, last = children[0], children[-1]
+            if first.tag is None and first.value:
+                first.value = first.value.lstrip()
+            if last.tag is None and last.value:
+                last.value = last.value.rstrip()
@@ -0,0 +1,142 @@
+import collections
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
+
+# sources read ahead of the renderer, and the threads reading them
+PREFETCH_DEPTH = 16
+PREFETCH_THREADS = 4
+# rendered chunks waiting for the writer before the renderer blocks, and their size in characters
+WRITE_DEPTH = 16
+WRITE_CHUNK = 64 * 1024
+# queued in place of a chunk when a page failed to render, so its file is dropped
+DISCARD = object()
+
+def decode_source(data: bytes) -> str:
+    # the same text open(path, "r") would give, universal newlines included
+    text = data.decode()
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+def read_source(path: str, max_size: int) -> tuple[bytes | None, os.stat_result]:
+    # None for sources too large to hold in memory; the renderer streams those itself.
+    # The stat is taken from the open file, so it describes the bytes that were read.
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        data = f.read(max_size + 1)
+    return (data if len(data) <= max_size else None), stat
+
+def prefetch(pages: list[tuple[str, str]], max_size: int, depth: int = PREFETCH_DEPTH,
+             threads: int = PREFETCH_THREADS) -> Iterator[tuple[str, str, bytes | None, os.stat_result]]:
+    """Yield (source, destination, source bytes, source stat) for pages, in order.
+
+    Up to depth sources are read ahead by a small thread pool while the caller
+    renders, so per-file latency (network mounts, cold caches) overlaps the
+    rendering instead of adding to it.
+    """
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="prefetch") as executor:
+        pending = collections.deque()
+        remaining = iter(pages)
+        for file_path_src, file_path_dst in remaining:
+            pending.append((file_path_src, file_path_dst, executor.submit(read_source, file_path_src, max_size)))
+            if len(pending) >= depth:
+                break
+        while pending:
+            file_path_src, file_path_dst, future = pending.popleft()
+            for next_src, next_dst in remaining:
+                pending.append((next_src, next_dst, executor.submit(read_source, next_src, max_size)))
+                break
+            yield file_path_src, file_path_dst, *future.result()
+
+class AsyncWriter:
+    """Writes rendered pages to a sink from a background thread.
+
+    Pages are handed over as their fragments are rendered, batched into
+    chunks of about chunk_size characters, so no page is ever joined into one
+    string. The queue is bounded, so a slow disk holds the renderer back
+    instead of letting rendered chunks pile up in memory. A page replaces
+    its previous output only once all of it was written (see OutputSink); one
+    that fails to render or write is discarded. The first write error is
+    raised from write_page(), close() or the end of the with block; later
+    pages are dropped.
+    """
+
+    def __init__(self, sink: 'OutputSink', depth: int = WRITE_DEPTH, chunk_size: int = WRITE_CHUNK) -> None:
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.error = None
+        self.queue = queue.Queue(maxsize=depth)
+        self.thread = threading.Thread(target=self.run, name="writer", daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        # items are (path, chunk) for each chunk of a page, then (path, None) once it is complete
+        # or (path, DISCARD) if it failed to render
+        f = None
+        while True:
+            item = self.queue.get()
+            if item is None:
+                if f is not None:
+                    # stopped part way through a page
+                    f.discard()
+                return
+            if self.error is not None:
+                continue
+            path, chunk = item
+            try:
+                if chunk is DISCARD:
+                    if f is not None:
+                        f, failed = None, f
+                        failed.discard()
+                    continue
+                if f is None:
+                    f = self.sink.open(path)
+                if chunk is None:
+                    f, done = None, f
+                    done.close()
+                else:
+                    f.write(chunk)
+            except Exception as e:
+                self.error = e
+                if f is not None:
+                    f, failed = None, f
+                    failed.discard()
+
+    def write_page(self, path: str, fragments: Iterable[str]) -> None:
+        if self.error is not None:
+            raise self.error
+        chunk, size = [], 0
+        try:
+            for fragment in fragments:
+                chunk.append(fragment)
+                size += len(fragment)
+                if size >= self.chunk_size:
+                    self.queue.put((path, "".join(chunk)))
+                    chunk, size = [], 0
+        except BaseException:
+            self.queue.put((path, DISCARD))
+            raise
+        if chunk:
+            self.queue.put((path, "".join(chunk)))
+        self.queue.put((path, None))
+
+    def close(self) -> None:
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self) -> 'AsyncWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # already failing: stop the writer but keep the original exception
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,176 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from functions import markdown_to_html_node, rewrite_urls, extract_title
+from template import Template
+from depgraph import SiteResolver
+from inventory import stat_signature
+
+# bodies smaller than this gain nothing from gzip
+GZIP_MIN_SIZE = 256
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+class Response:
+    __slots__ = ("signature", "body", "content_type", "etag", "_gzipped")
+
+    def __init__(self, signature: tuple, body: bytes, content_type: str) -> None:
+        self.signature = signature
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self._gzipped = None
+
+    def compressible(self) -> bool:
+        return len(self.body) >= GZIP_MIN_SIZE and self.content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def gzipped(self) -> bytes:
+        # compressed lazily, once, the first time a client asks for it
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+class PreviewSite:
+    """Renders pages from content/ on request and keeps the bytes in memory.
+
+    A cached response is reused for as long as the stat signature of its
+    source (and, for pages, of the template) is unchanged, so edits show up on
+    the next request without any disk build.
+    """
+
+    def __init__(self, content_dir: str, static_dir: str, template_path: str, basepath: str) -> None:
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        # pages are served from the server root under the basepath, e.g. /static_website_generator/blog/tom;
+        # rendering with the prefix minus its trailing slash keeps root-relative URLs working for "/"
+        self.prefix = basepath.rstrip("/")
+        self.resolver = SiteResolver(content_dir, static_dir)
+        self.responses = {}
+        self._template = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def inside(path: str, root: str) -> bool:
+        return os.path.commonpath([os.path.abspath(path), os.path.abspath(root)]) == os.path.abspath(root)
+
+    def template(self) -> Template:
+        signature = stat_signature(self.template_path)
+        with self._lock:
+            if self._template is None or self._template[0] != signature:
+                self._template = (signature, Template.from_file(self.template_path, self.prefix))
+            return self._template[1]
+
+    def locate(self, url_path: str) -> tuple[str, str] | None:
+        # ("static" | "page", file path) for a request path, None when nothing matches
+        if self.prefix:
+            if url_path != self.prefix and not url_path.startswith(self.prefix + "/"):
+                return None
+            url_path = url_path[len(self.prefix):] or "/"
+        static_path = self.resolver.resolve_image(url_path)
+        if static_path is not None and self.inside(static_path, self.static_dir):
+            return "static", static_path
+        page = self.resolver.resolve_link(url_path)
+        if page is not None and self.inside(page, self.content_dir):
+            return "page", page
+        return None
+
+    def render_page(self, source: str) -> bytes:
+        with open(source, "r") as md:
+            markdown = md.read()
+        html_node = markdown_to_html_node(markdown)
+        rewrite_urls(html_node, self.prefix)
+        html = self.template().render({"Title": extract_title(markdown), "Content": html_node.to_html()})
+        return html.encode("utf-8")
+
+    def get(self, url_path: str) -> Response | None:
+        located = self.locate(url_path)
+        if located is None:
+            return None
+        kind, path = located
+        signature = (stat_signature(path),)
+        if kind == "page":
+            signature += (stat_signature(self.template_path),)
+
+        with self._lock:
+            cached = self.responses.get(url_path)
+        if cached is not None and cached.signature == signature:
+            return cached
+
+        # render outside the lock; two threads racing on the same page both produce the same bytes
+        if kind == "page":
+            response = Response(signature, self.render_page(path), "text/html; charset=utf-8")
+        else:
+            with open(path, "rb") as f:
+                body = f.read()
+            response = Response(signature, body, mimetypes.guess_type(path)[0] or "application/octet-stream")
+        with self._lock:
+            self.responses[url_path] = response
+        return response
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive; every response carries a Content-Length
+    protocol_version = "HTTP/1.1"
+    site = None
+
+    def do_GET(self) -> None:
+        self.respond(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self.respond(send_body=False)
+
+    def respond(self, send_body: bool) -> None:
+        url_path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        try:
+            response = self.site.get(url_path)
+        except Exception as e:
+            self.send_error(500, f"failed to render {url_path}: {e}")
+            return
+        if response is None:
+            self.send_error(404)
+            return
+
+        use_gzip = response.compressible() and "gzip" in self.headers.get("Accept-Encoding", "")
+        # the compressed variant is a different representation, so it gets its own validator
+        etag = response.etag[:-1] + '-gz"' if use_gzip else response.etag
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = response.gzipped() if use_gzip else response.body
+        self.send_response(200)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        # always revalidate, so edits show up on reload
+        self.send_header("Cache-Control", "no-cache")
+        if response.compressible():
+            self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+def make_server(site: PreviewSite, host: str, port: int) -> ThreadingHTTPServer:
+    handler = type("BoundPreviewHandler", (PreviewHandler,), {"site": site})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def serve(site: PreviewSite, host: str = "127.0.0.1", port: int = 8888) -> None:
+    server = make_server(site, host, port)
+    print(f"Serving {site.content_dir} at http://{host}:{server.server_port}{site.prefix}/ (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
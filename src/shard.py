@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import shutil
+
+from manifest import hash_file
+from sync import clone_file
+
+SHARD_MANIFEST = "shard-manifest.json"
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    # "2/8" -> (2, 8); shards are numbered from 0
+    index, separator, count = spec.partition("/")
+    if not separator or not index.isdigit() or not count.isdigit() or not 0 <= int(index) < int(count):
+        raise ValueError(f"expected i/N with 0 <= i < N, got {spec!r}")
+    return int(index), int(count)
+
+def site_path(path: str, root: str) -> str:
+    # the same on every machine, whatever the checkout is called
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+def shard_of(source: str, count: int) -> int:
+    # a stable hash of the path inside content/, so every machine agrees on the partition
+    return int.from_bytes(hashlib.sha256(source.encode()).digest()[:8], "big") % count
+
+def inventory_digest(sources: list[str]) -> str:
+    digest = hashlib.sha256()
+    for source in sorted(sources):
+        digest.update(source.encode() + b"\0")
+    return digest.hexdigest()
+
+def select_shard(pages: list[tuple[str, str]], content_dir: str, shard: tuple[int, int]) -> list[tuple[str, str]]:
+    index, count = shard
+    return [(source, output) for source, output in pages if shard_of(site_path(source, content_dir), count) == index]
+
+def write_shard_manifest(dest_dir: str, shard: tuple[int, int], basepath: str, content_dir: str,
+                         all_pages: list[tuple[str, str]], pages: list[tuple[str, str]]) -> str:
+    """Record what one shard produced, for merge_shards to check.
+
+    Every file under dest_dir is listed with its hash. The pages of the
+    shard map to their sources, and the digest of the whole page inventory
+    lets the merge prove that the shards together cover every page.
+    """
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(dest_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            if path != os.path.join(dest_dir, SHARD_MANIFEST):
+                files[site_path(path, dest_dir)] = hash_file(path)
+    data = {
+        "shard": shard[0],
+        "shards": shard[1],
+        "basepath": basepath,
+        "inventory": inventory_digest([site_path(source, content_dir) for source, _ in all_pages]),
+        "pages": {site_path(output, dest_dir): site_path(source, content_dir) for source, output in pages},
+        "files": files,
+    }
+    path = os.path.join(dest_dir, SHARD_MANIFEST)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    return path
+
+def load_shard_manifest(shard_dir: str) -> dict:
+    with open(os.path.join(shard_dir, SHARD_MANIFEST), "r") as f:
+        return json.load(f)
+
+def check_shards(shard_dirs: list[str]) -> tuple[list[str], dict[str, str]]:
+    """Validate the shard outputs against their manifests.
+
+    Returns the problems found and, for every output path, the shard
+    directory that provides it.
+    """
+    problems = []
+    owners = {}
+    manifests = {}
+    for shard_dir in shard_dirs:
+        try:
+            manifests[shard_dir] = load_shard_manifest(shard_dir)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            problems.append(f"{shard_dir}: no readable {SHARD_MANIFEST} ({e})")
+    if problems:
+        return problems, owners
+
+    first = next(iter(manifests.values()))
+    count = first["shards"]
+    indexes = sorted(manifest["shard"] for manifest in manifests.values())
+    if indexes != list(range(count)):
+        problems.append(f"expected shards 0..{count - 1} once each, got {indexes}")
+    for shard_dir, manifest in manifests.items():
+        for key in ("shards", "basepath", "inventory"):
+            if manifest[key] != first[key]:
+                problems.append(f"{shard_dir}: {key} {manifest[key]!r} differs from {first[key]!r}")
+
+    sources = []
+    for shard_dir, manifest in manifests.items():
+        for output, source in manifest["pages"].items():
+            sources.append(source)
+            if shard_of(source, count) != manifest["shard"]:
+                problems.append(f"{shard_dir}: {source} belongs to shard {shard_of(source, count)}")
+            if output not in manifest["files"]:
+                problems.append(f"{shard_dir}: page {output} is missing")
+        for output, digest in manifest["files"].items():
+            if output in owners:
+                problems.append(f"{output} is written by both {owners[output]} and {shard_dir}")
+                continue
+            owners[output] = shard_dir
+            path = os.path.join(shard_dir, output)
+            if not os.path.isfile(path):
+                problems.append(f"{shard_dir}: {output} is missing")
+            elif hash_file(path) != digest:
+                problems.append(f"{shard_dir}: {output} changed since the shard was built")
+    if len(set(sources)) != len(sources) or inventory_digest(sources) != first["inventory"]:
+        problems.append("the shards do not cover the page inventory exactly once")
+    return problems, owners
+
+def merge_shards(shard_dirs: list[str], dest_dir: str, hardlink: bool = False) -> int:
+    """Assemble the outputs of every shard into dest_dir.
+
+    Nothing is written unless the shards check out: each shard present
+    once, built from the same inventory and basepath, no output path from
+    two shards, no page or file missing. The merged tree is built next to
+    dest_dir and swapped in at the end. Returns the number of files.
+    """
+    problems, owners = check_shards(shard_dirs)
+    if problems:
+        raise ValueError("cannot merge shards:\n" + "\n".join(f"  {problem}" for problem in problems))
+
+    tmp_dir = f"{os.path.normpath(dest_dir)}.merge"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    for output in sorted(owners):
+        path = os.path.join(tmp_dir, output)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        clone_file(os.path.join(owners[output], output), path, hardlink)
+    os.makedirs(tmp_dir, exist_ok=True)
+    shutil.rmtree(dest_dir, ignore_errors=True)
+    os.replace(tmp_dir, dest_dir)
+    return len(owners)
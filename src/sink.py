@@ -0,0 +1,199 @@
+import gzip
+import io
+import os
+import tarfile
+from typing import TextIO
+
+from sync import clone_file
+
+class OutputSink:
+    """Where a build writes its pages and static files.
+
+    Paths are the same destination paths the build would use on disk
+    (docs/blog/tom/index.html), so the pipeline does not care which sink it
+    writes through. shared tells generate_pages whether worker processes can
+    write to the sink directly or must hand their pages back to the parent.
+    A file from open() stores the page when closed; discard() drops it, as
+    does leaving its with block with an exception, so a page that fails to
+    render never replaces the previous one.
+    """
+
+    shared = False
+
+    def open(self, path: str) -> TextIO:
+        raise NotImplementedError
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def copy_file(self, src: str, dst: str, hardlink: bool = False) -> str:
+        raise NotImplementedError
+
+class DiscardOnError:
+    # with blocks that raise drop the page instead of storing what was written of it
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+class AtomicFile(DiscardOnError, io.TextIOBase):
+    # written next to path and renamed over it when complete
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.file = open(self.tmp_path, "w")
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return self.file.write(text)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.file.close()
+            os.replace(self.tmp_path, self.path)
+        super().close()
+
+    def discard(self) -> None:
+        if not self.closed:
+            self.file.close()
+            os.remove(self.tmp_path)
+        super().close()
+
+class DirectorySink(OutputSink):
+    shared = True
+
+    def open(self, path: str) -> TextIO:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return AtomicFile(path)
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def copy_file(self, src: str, dst: str, hardlink: bool = False) -> str:
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        return clone_file(src, dst, hardlink)
+
+class MemoryFile(DiscardOnError, io.StringIO):
+    # text buffer that stores its contents in the sink when closed
+    def __init__(self, sink: 'MemorySink', path: str) -> None:
+        super().__init__()
+        self.sink = sink
+        self.path = path
+
+    def close(self) -> None:
+        if not self.closed:
+            self.sink.write_bytes(self.path, self.getvalue().encode("utf-8"))
+        super().close()
+
+    def discard(self) -> None:
+        super().close()
+
+class MemorySink(OutputSink):
+    """Collects a whole build as a path -> bytes mapping."""
+
+    def __init__(self) -> None:
+        self.files = {}
+
+    def open(self, path: str) -> TextIO:
+        return MemoryFile(self, path)
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        self.files[os.path.normpath(path)] = data
+
+    def copy_file(self, src: str, dst: str, hardlink: bool = False) -> str:
+        with open(src, "rb") as f:
+            self.write_bytes(dst, f.read())
+        return "memory"
+
+    def read(self, path: str) -> bytes:
+        return self.files[os.path.normpath(path)]
+
+    def write_tar(self, archive_path: str, root: str) -> int:
+        # one sequential write for the whole site; fixed mtimes keep the archive reproducible
+        compress = archive_path.endswith((".tar.gz", ".tgz"))
+        with open(archive_path, "wb") as raw:
+            fileobj = gzip.GzipFile(filename="", fileobj=raw, mode="wb", mtime=0) if compress else raw
+            with tarfile.open(fileobj=fileobj, mode="w", format=tarfile.PAX_FORMAT) as tar:
+                for path in sorted(self.files):
+                    data = self.files[path]
+                    info = tarfile.TarInfo(os.path.relpath(path, root))
+                    info.size = len(data)
+                    info.mode = 0o644
+                    tar.addfile(info, io.BytesIO(data))
+            if compress:
+                fileobj.close()
+        return len(self.files)
+
+DISK = DirectorySink()
+
+def target_marker(targets: list[tuple[str, str]]) -> str:
+    # stands in for the basepath while rendering; NUL never occurs in markdown or the template,
+    # and naming every target means a change to the set of targets changes the recorded basepath
+    return "\0" + "\0".join(f"{basepath}={dest_dir}" for basepath, dest_dir in targets) + "\0"
+
+class TargetFile(DiscardOnError, io.TextIOBase):
+    # one page written to every target as it is rendered; the marker never spans two writes,
+    # since every URL is rewritten inside a single fragment
+    def __init__(self, marker: str, files: list[tuple[str, TextIO]]) -> None:
+        self.marker = marker
+        self.files = files
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        for basepath, f in self.files:
+            f.write(text.replace(self.marker, basepath))
+        return len(text)
+
+    def close(self) -> None:
+        if not self.closed:
+            for _, f in self.files:
+                f.close()
+        super().close()
+
+    def discard(self) -> None:
+        if not self.closed:
+            for _, f in self.files:
+                f.discard()
+        super().close()
+
+class TargetSink(OutputSink):
+    """Writes one rendering of the site to several (basepath, directory) targets.
+
+    Pages are rendered once with marker as their basepath; every target gets
+    a copy with the marker replaced by its own basepath. Paths are given
+    under the first target's directory. Static files are copied into the
+    first target and hardlinked from there into the others, so identical
+    files share one inode across targets.
+    """
+
+    shared = True
+
+    def __init__(self, targets: list[tuple[str, str]]) -> None:
+        self.targets = targets
+        self.dest_dir = targets[0][1]
+        self.marker = target_marker(targets)
+
+    def target_path(self, path: str, dest_dir: str) -> str:
+        return os.path.normpath(os.path.join(dest_dir, os.path.relpath(path, self.dest_dir)))
+
+    def open(self, path: str) -> TextIO:
+        return TargetFile(self.marker, [(basepath, DISK.open(self.target_path(path, dest_dir)))
+                                        for basepath, dest_dir in self.targets])
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        marker = self.marker.encode()
+        for basepath, dest_dir in self.targets:
+            DISK.write_bytes(self.target_path(path, dest_dir), data.replace(marker, basepath.encode()))
+
+    def copy_file(self, src: str, dst: str, hardlink: bool = False) -> str:
+        method = DISK.copy_file(src, dst, hardlink)
+        for _, dest_dir in self.targets[1:]:
+            DISK.copy_file(dst, self.target_path(dst, dest_dir), hardlink=True)
+        return method
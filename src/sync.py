@@ -0,0 +1,172 @@
+import os
+import shutil
+import sys
+
+from manifest import hash_file
+from inventory import scan_tree
+
+# ioctl request number for FICLONE on Linux (copy-on-write clone of a whole file)
+FICLONE = 0x40049409
+
+def reflink_file(fsrc, fdst) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except (ImportError, OSError):
+        return False
+    return True
+
+def copy_file_range(fsrc, fdst) -> bool:
+    # in-kernel copy, no round trip of the data through user space
+    if not hasattr(os, "copy_file_range"):
+        return False
+    remaining = os.fstat(fsrc.fileno()).st_size
+    try:
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    except OSError:
+        # e.g. EXDEV on older kernels - start over with a plain copy
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
+        return False
+    return True
+
+def clone_file(src: str, dst: str, hardlink: bool = False) -> str:
+    # never write through an existing file, it may be a hardlink to an old source
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    if hardlink:
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if reflink_file(fsrc, fdst):
+            method = "reflink"
+        elif copy_file_range(fsrc, fdst):
+            method = "copy_file_range"
+        else:
+            shutil.copyfileobj(fsrc, fdst)
+            method = "copy"
+    # keep the source mtime so the next sync can compare size and mtime
+    shutil.copystat(src, dst)
+    return method
+
+def needs_copy(src: str, dst: str, checksum: bool = False, src_stat: tuple[int, int] | None = None) -> bool:
+    # src_stat is the (mtime_ns, size) of src when the caller already has it
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return True
+    if src_stat is None:
+        stat = os.stat(src)
+        src_stat = (stat.st_mtime_ns, stat.st_size)
+    if src_stat[1] != dst_stat.st_size:
+        return True
+    if checksum:
+        return hash_file(src) != hash_file(dst)
+    return src_stat[0] != dst_stat.st_mtime_ns
+
+def remove_empty_dirs(path: str, root: str) -> None:
+    # walk up from path removing directories until one is not empty
+    root = os.path.abspath(root)
+    path = os.path.abspath(path)
+    while path != root and path.startswith(root):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
+
+def destination_path(src: str, dst: str, file_path_src: str, assets: dict[str, str] | None = None) -> str:
+    relative = os.path.relpath(file_path_src, src)
+    if assets:
+        # assets maps site URLs to fingerprinted ones, "/images/a.png" -> "/images/a.<hash>.png"
+        url = "/" + relative.replace(os.sep, "/")
+        relative = assets.get(url, url).lstrip("/")
+    return os.path.normpath(os.path.join(dst, relative))
+
+def sync_dir(src: str, dst: str, tracked: dict[str, dict], checksum: bool = False, hardlink: bool = False,
+             assets: dict[str, str] | None = None, inventory: 'Inventory | None' = None,
+             link_from: str | None = None) -> dict[str, int]:
+    """Mirror src into dst, copying only changed files.
+
+    tracked maps every destination file a previous sync produced to its source.
+    Only those files are ever deleted, so generated pages in dst are left alone.
+    With assets, files are written under their fingerprinted names. inventory
+    is a scan of src (inventory.scan_tree) that already has the file stats.
+    With link_from, files are hardlinked from the copies an earlier sync of
+    the same build made into that directory instead of copied again.
+    """
+    stats = {"copied": 0, "unchanged": 0, "removed": 0}
+    synced = set()
+    os.makedirs(dst, exist_ok=True)
+    if inventory is None:
+        inventory = scan_tree(src, {})
+
+    for dirpath in inventory.dirs:
+        os.makedirs(os.path.join(dst, os.path.relpath(dirpath, src)), exist_ok=True)
+
+    for file_path_src, (mtime_ns, size) in inventory.files.items():
+        file_path_dst = destination_path(src, dst, file_path_src, assets)
+        synced.add(file_path_dst)
+
+        if needs_copy(file_path_src, file_path_dst, checksum, (mtime_ns, size)):
+            if link_from is not None:
+                method = clone_file(destination_path(src, link_from, file_path_src, assets), file_path_dst, True)
+            else:
+                method = clone_file(file_path_src, file_path_dst, hardlink)
+            print(f"copying {file_path_src} to {file_path_dst} ({method})")
+            stats["copied"] += 1
+        else:
+            stats["unchanged"] += 1
+
+        tracked[file_path_dst] = {"source": file_path_src, "size": size, "mtime_ns": mtime_ns}
+
+    # delete files a previous sync copied whose source has since disappeared
+    dst_root = os.path.normpath(dst)
+    for file_path_dst in sorted(tracked):
+        if file_path_dst in synced or not file_path_dst.startswith(dst_root + os.sep):
+            continue
+        del tracked[file_path_dst]
+        if os.path.isfile(file_path_dst):
+            print(f"removing orphaned {file_path_dst}")
+            os.remove(file_path_dst)
+            remove_empty_dirs(os.path.dirname(file_path_dst), dst_root)
+            stats["removed"] += 1
+
+    return stats
+
+def sync_paths(src: str, dst: str, paths: list[str], tracked: dict[str, dict],
+               checksum: bool = False, hardlink: bool = False) -> dict[str, int]:
+    # sync_dir restricted to a few changed source files, for watch mode
+    stats = {"copied": 0, "unchanged": 0, "removed": 0}
+    for file_path_src in sorted(paths):
+        file_path_dst = destination_path(src, dst, file_path_src)
+        if os.path.isfile(file_path_src):
+            if needs_copy(file_path_src, file_path_dst, checksum):
+                os.makedirs(os.path.dirname(file_path_dst), exist_ok=True)
+                method = clone_file(file_path_src, file_path_dst, hardlink)
+                print(f"copying {file_path_src} to {file_path_dst} ({method})")
+                stats["copied"] += 1
+            else:
+                stats["unchanged"] += 1
+            stat = os.stat(file_path_src)
+            tracked[file_path_dst] = {"source": file_path_src, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        elif file_path_dst in tracked:
+            del tracked[file_path_dst]
+            if os.path.isfile(file_path_dst):
+                print(f"removing orphaned {file_path_dst}")
+                os.remove(file_path_dst)
+                remove_empty_dirs(os.path.dirname(file_path_dst), dst)
+                stats["removed"] += 1
+    return stats
@@ -0,0 +1,115 @@
+import hashlib
+import re
+
+from minify import minify_markup
+from typing import Iterable, Iterator, TextIO
+
+# the placeholders a page fills; any other {{ ... }} text is left in the output as written
+SLOTS = ("Title", "Content")
+SLOT_PATTERN = re.compile(r"\{\{ (" + "|".join(SLOTS) + r") \}\}")
+URL_ATTRIBUTES = ("href", "src")
+TEMPLATE_URL_PATTERN = re.compile(r'\b(href|src)="(/[^"]*)"')
+URL_SUFFIX_PATTERN = re.compile(r"[?#]")
+
+def rewrite_url(url: str, basepath: str, assets: dict[str, str] | None = None) -> str:
+    # only site-absolute URLs are served under the basepath
+    if not url.startswith("/"):
+        return url
+    if assets:
+        # fingerprinted static files keep any query string or fragment
+        match = URL_SUFFIX_PATTERN.search(url)
+        path, suffix = (url[:match.start()], url[match.start():]) if match else (url, "")
+        url = assets.get(path, path) + suffix
+    return f"{basepath}{url}"
+
+def asset_map_digest(assets: dict[str, str] | None) -> str:
+    # identifies one set of fingerprinted names, for cache keys and template hashes
+    if not assets:
+        return ""
+    digest = hashlib.sha256()
+    for url, fingerprinted in sorted(assets.items()):
+        digest.update(f"{url}\0{fingerprinted}\0".encode())
+    return digest.hexdigest()
+
+class Template:
+    """Page template compiled once per build.
+
+    The template text is split into static segments and the named slots in
+    SLOTS ("{{ Title }}" -> "Title"). The basepath and any fingerprinted asset names
+    are applied to the template's own href/src URLs at compile time, as is
+    minification, so rendering a page is a single join.
+    """
+
+    def __init__(self, source: str, basepath: str, assets: dict[str, str] | None = None,
+                 minify: bool = False, images: dict[str, tuple[int, int]] | None = None) -> None:
+        self.basepath = basepath
+        self.assets = assets
+        self.minify = minify
+        # site URL -> (width, height); when set, page images get their size and lazy loading
+        self.images = images
+        # the fingerprinted assets the template itself links, they change its output
+        self.fingerprints = {}
+
+        def rewrite(match: re.Match) -> str:
+            url = match.group(2)
+            path = URL_SUFFIX_PATTERN.split(url, 1)[0]
+            if assets and path in assets:
+                self.fingerprints[path] = assets[path]
+            return f'{match.group(1)}="{rewrite_url(url, basepath, assets)}"'
+
+        source = TEMPLATE_URL_PATTERN.sub(rewrite, source)
+        if minify:
+            source = minify_markup(source)
+
+        # re.split with a capture group alternates: static, slot name, static, ...
+        parts = SLOT_PATTERN.split(source)
+        self.segments = parts
+        self.slots = [(index, parts[index]) for index in range(1, len(parts), 2)]
+
+    @classmethod
+    def from_file(cls, path: str, basepath: str, assets: dict[str, str] | None = None,
+                  minify: bool = False, images: dict[str, tuple[int, int]] | None = None) -> 'Template':
+        with open(path, "r") as tp:
+            return cls(tp.read(), basepath, assets, minify, images)
+
+    def output_hash(self, source_hash: str) -> str:
+        # pages depend on the template file and on how it was compiled
+        if not self.assets and not self.minify and self.images is None:
+            return source_hash
+        options = {"template": source_hash, "minify": str(self.minify), "images": str(self.images is not None)}
+        return asset_map_digest({**options, **self.fingerprints})
+
+    def render_context(self) -> str:
+        # everything besides the block text that shapes a rendered block, for block cache keys
+        context = self.basepath
+        if self.assets:
+            context += "\0" + asset_map_digest(self.assets)
+        if self.minify:
+            context += "\0minify"
+        if self.images is not None:
+            sizes = {url: f"{width}x{height}" for url, (width, height) in self.images.items()}
+            context += "\0images" + asset_map_digest(sizes)
+        return context
+
+    def render(self, values: dict[str, str]) -> str:
+        parts = list(self.segments)
+        for index, name in self.slots:
+            parts[index] = values[name]
+        return "".join(parts)
+
+    def iter_render(self, values: dict[str, 'str | HTMLNode | Iterable[str]']) -> Iterator[str]:
+        # slot values may be strings, HTML nodes (serialized lazily) or iterables of fragments
+        for index, segment in enumerate(self.segments):
+            if index % 2 == 0:
+                yield segment
+                continue
+            value = values[segment]
+            if isinstance(value, str):
+                yield value
+            elif hasattr(value, "iter_html"):
+                yield from value.iter_html()
+            else:
+                yield from value
+
+    def write(self, fp: TextIO, values: dict[str, 'str | HTMLNode | Iterable[str]']) -> None:
+        fp.writelines(self.iter_render(values))
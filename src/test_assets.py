@@ -0,0 +1,101 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+
+from fixtures import TempDirTestCase
+from assets import fingerprint_name, fingerprint_assets, hash_static_files, ASSET_MANIFEST
+from build import SiteBuilder
+from template import Template, rewrite_url
+
+TEMPLATE = '<html><link href="/index.css" /><title>{{ Title }}</title><body>{{ Content }}</body></html>'
+
+class TestAssets(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![logo](/images/logo.png) [pdf](/files/a.pdf#page=2)")
+        self.write(os.path.join(self.content, "other", "index.md"), "# Other\n\n[home](/)")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "logo.png"), "png")
+        self.write(os.path.join(self.static, "files", "a.pdf"), "pdf")
+
+    def read(self, path: str) -> str:
+        with open(os.path.join(self.docs, path)) as f:
+            return f.read()
+
+    def builder(self) -> SiteBuilder:
+        return SiteBuilder(self.content, self.static, self.template, self.docs, "/base",
+                           os.path.join(self.tmp.name, "manifest.json"), fingerprint=True)
+
+    def build(self) -> list[str]:
+        builder = self.builder()
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            builder.build()
+        return [line.split()[3] for line in log.getvalue().splitlines() if line.startswith("Generating page")]
+
+    def asset_manifest(self) -> dict[str, str]:
+        return json.loads(self.read(ASSET_MANIFEST))
+
+    def test_explain_matches_fingerprinted_build(self):
+        self.build()
+        report = self.builder().explain(os.path.join(self.content, "index.md"))
+        self.assertIn("status:   up to date", report)
+
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name("/images/logo.png", "0123456789abcdef"), "/images/logo.0123456789.png")
+        self.assertEqual(fingerprint_name("/LICENSE", "0123456789abcdef"), "/LICENSE.0123456789")
+
+    def test_fingerprints_stable_and_cached(self):
+        recorded = {}
+        first = fingerprint_assets(hash_static_files(self.static, recorded))
+        self.assertEqual(fingerprint_assets(hash_static_files(self.static, {})), first)
+        self.assertEqual(fingerprint_assets(hash_static_files(self.static, recorded)), first)
+        self.assertEqual(set(first), {"/index.css", "/images/logo.png", "/files/a.pdf"})
+
+    def test_rewrite_url_keeps_suffix(self):
+        assets = {"/a.pdf": "/a.123.pdf"}
+        self.assertEqual(rewrite_url("/a.pdf#page=2", "/base", assets), "/base/a.123.pdf#page=2")
+        self.assertEqual(rewrite_url("/other", "/base", assets), "/base/other")
+        self.assertEqual(rewrite_url("https://x.org/a.pdf", "/base", assets), "https://x.org/a.pdf")
+
+    def test_template_fingerprints(self):
+        template = Template(TEMPLATE, "/base", {"/index.css": "/index.abc.css"})
+        self.assertIn('<link href="/base/index.abc.css" />', template.render({"Title": "", "Content": ""}))
+        self.assertEqual(template.fingerprints, {"/index.css": "/index.abc.css"})
+
+    def test_build_links_fingerprinted_names(self):
+        self.build()
+        assets = self.asset_manifest()
+        html = self.read("index.html")
+        self.assertIn(f'href="/base{assets["/index.css"]}"', html)
+        self.assertIn(f'src="/base{assets["/images/logo.png"]}"', html)
+        self.assertIn(f'href="/base{assets["/files/a.pdf"]}#page=2"', html)
+        self.assertTrue(os.path.isfile(os.path.join(self.docs, assets["/images/logo.png"].lstrip("/"))))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", "logo.png")))
+
+    def test_changed_image_rebuilds_embedder_only(self):
+        self.build()
+        old = self.asset_manifest()["/images/logo.png"]
+        self.write(os.path.join(self.static, "images", "logo.png"), "new png")
+        self.assertEqual(self.build(), [os.path.join(self.content, "index.md")])
+        new = self.asset_manifest()["/images/logo.png"]
+        self.assertNotEqual(old, new)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, old.lstrip("/"))))
+        self.assertIn(new, self.read("index.html"))
+
+    def test_changed_stylesheet_rebuilds_every_page(self):
+        self.build()
+        self.assertEqual(self.build(), [])
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual(len(self.build()), 2)
+
+if __name__ == "__main__":
+    unittest.main()
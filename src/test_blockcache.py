@@ -0,0 +1,82 @@
+import unittest
+import contextlib
+import io
+import os
+
+from blockcache import BlockCache
+from fixtures import TempDirTestCase
+from textnode import BlockType
+from functions import generate_pages_recursive, iter_blocks_html, scan_blocks, markdown_to_html_node
+
+class TestBlockCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_path = self.path("blocks.sqlite")
+
+    def test_put_get_persists(self):
+        cache = BlockCache(self.cache_path)
+        key = BlockCache.key("text", BlockType.PARAGRAPH, "/")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<p>text</p>")
+        self.assertEqual(cache.get(key), "<p>text</p>")
+        cache.close()
+
+        reopened = BlockCache(self.cache_path)
+        self.assertEqual(reopened.get(key), "<p>text</p>")
+        reopened.close()
+
+    def test_key_depends_on_context(self):
+        self.assertNotEqual(
+            BlockCache.key("[a](/a)", BlockType.PARAGRAPH, "/"),
+            BlockCache.key("[a](/a)", BlockType.PARAGRAPH, "/base"),
+        )
+
+    def test_lru_eviction(self):
+        cache = BlockCache(self.cache_path, max_bytes=25)
+        for name in ("a", "b", "c"):
+            cache.put(name, "x" * 10)
+            cache.flush()
+        cache.get("a")
+        cache.flush()
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        cache.close()
+
+    def test_cached_blocks_match_uncached(self):
+        md = "# Title\n\nSome **bold** [link](/x)\n\n- one\n- two\n\n```\ncode\n```"
+        expected = markdown_to_html_node(md).to_html()
+        cache = BlockCache(self.cache_path)
+        first = "".join(iter_blocks_html(scan_blocks(md.split("\n")), "", cache))
+        self.assertEqual(cache.misses, 4)
+        second = "".join(iter_blocks_html(scan_blocks(md.split("\n")), "", cache))
+        self.assertEqual(cache.hits, 4)
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+        cache.close()
+
+    def test_build_with_cache_matches_plain_build(self):
+        content = os.path.join(self.tmp.name, "content")
+        template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(content)
+        with open(os.path.join(content, "index.md"), "w") as f:
+            f.write("# Home\n\n[blog](/blog)\n\n" + "paragraph **text**\n\n" * 50)
+        with open(template, "w") as f:
+            f.write('<title>{{ Title }}</title><link href="/index.css" />{{ Content }}')
+
+        outputs = []
+        with open(os.path.join(content, "other.md"), "w") as f:
+            f.write("# Other\n\nparagraph **text**")
+        builds = (("plain", None, 1), ("cold", self.cache_path, 1), ("warm", self.cache_path, 1),
+                  ("parallel", self.cache_path, 2))
+        for dest_name, block_cache, jobs in builds:
+            dest = os.path.join(self.tmp.name, dest_name)
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content, template, dest, "/base", jobs=jobs, block_cache=block_cache)
+            with open(os.path.join(dest, "index.html")) as f:
+                outputs.append(f.read())
+        self.assertEqual(len(set(outputs)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
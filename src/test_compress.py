@@ -0,0 +1,87 @@
+import unittest
+import contextlib
+import gzip
+import io
+import os
+
+import compress
+from build import SiteBuilder
+from compress import precompress_tree
+from fixtures import TempDirTestCase
+
+class TestPrecompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = os.path.join(self.root, "blog", "index.html")
+        self.write(self.page, "<p>hello</p>" * 200)
+        self.write(os.path.join(self.root, "small.css"), "body {}")
+        self.write(os.path.join(self.root, "logo.png"), "x" * 5000)
+
+    def test_writes_gzip_siblings(self):
+        stats = precompress_tree(self.root)
+        self.assertEqual(stats, {"compressed": 1, "current": 0, "skipped": 1, "removed": 0})
+        with open(self.page, "rb") as f, gzip.open(self.page + ".gz") as gz:
+            self.assertEqual(gz.read(), f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.root, "small.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "logo.png.gz")))
+
+    def test_skips_current_siblings(self):
+        precompress_tree(self.root)
+        self.assertEqual(precompress_tree(self.root)["current"], 1)
+        self.write(self.page, "<p>changed</p>" * 200)
+        self.assertEqual(precompress_tree(self.root)["compressed"], 1)
+        with gzip.open(self.page + ".gz") as gz:
+            self.assertTrue(gz.read().startswith(b"<p>changed</p>"))
+
+    def test_removes_orphaned_siblings(self):
+        siblings = set()
+        precompress_tree(self.root, siblings=siblings)
+        os.remove(self.page)
+        self.assertEqual(precompress_tree(self.root, previous=siblings)["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "blog")))
+
+    def test_keeps_shipped_compressed_files(self):
+        shipped = self.write(os.path.join(self.root, "data", "blob.json.gz"), "already compressed")
+        self.assertEqual(precompress_tree(self.root)["removed"], 0)
+        self.assertTrue(os.path.exists(shipped))
+
+    def test_parallel_matches_serial(self):
+        precompress_tree(self.root, jobs=2)
+        with open(self.page + ".gz", "rb") as f:
+            parallel = f.read()
+        os.remove(self.page + ".gz")
+        precompress_tree(self.root)
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), parallel)
+
+    def test_switching_off_removes_siblings(self):
+        self.write("site/template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("site/content/index.md", "# Home\n\n" + "A long paragraph. " * 100)
+        self.write("site/static/index.css", "body { color: red; }\n" * 100)
+        docs = self.path("site", "docs")
+
+        def build(precompress: bool) -> None:
+            builder = SiteBuilder(self.path("site", "content"), self.path("site", "static"),
+                                  self.path("site", "template.html"), docs, "/",
+                                  self.path("site", "manifest.json"), precompress=precompress)
+            with contextlib.redirect_stdout(io.StringIO()):
+                builder.build()
+
+        self.write("site/static/data/blob.json.gz", "shipped as is")
+        build(True)
+        build(True)
+        self.assertTrue(os.path.exists(os.path.join(docs, "index.html.gz")))
+        self.assertTrue(os.path.exists(os.path.join(docs, "index.css.gz")))
+        self.assertTrue(os.path.exists(os.path.join(docs, "data", "blob.json.gz")))
+        build(False)
+        self.assertEqual(sorted(os.listdir(docs)), ["data", "index.css", "index.html"])
+        self.assertTrue(os.path.exists(os.path.join(docs, "data", "blob.json.gz")))
+
+    @unittest.skipIf(compress.brotli is None, "brotli is not installed")
+    def test_brotli_sibling(self):
+        precompress_tree(self.root)
+        with open(self.page + ".br", "rb") as f, open(self.page, "rb") as page:
+            self.assertEqual(compress.brotli.decompress(f.read()), page.read())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import io
+import os
+import threading
+from unittest import mock
+
+import client
+from fixtures import TempDirTestCase, TEMPLATE
+from build import SiteBuilder
+from daemon import BuildDaemon, make_daemon_server
+from main import parse_args
+
+class TestDaemon(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\n[about](/about)")
+        self.write("content/about/index.md", "# About")
+        self.write("static/index.css", "body {}")
+        self.created = []
+
+        self.daemon = BuildDaemon(parse_args, self.make_builder)
+        self.socket_path = os.path.join(self.root, "daemon.sock")
+        self.server = make_daemon_server(self.daemon, self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+        self.thread.start()
+        patcher = mock.patch.object(client, "SOCKET_PATH", self.socket_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def make_builder(self, args) -> SiteBuilder:
+        builder = SiteBuilder(self.path("content"), self.path("static"), self.path("template.html"),
+                              self.path("docs"), args.basepath, self.path(".build", "manifest.json"),
+                              image_sizes=not args.no_image_sizes)
+        self.created.append(builder)
+        return builder
+
+    def request(self, command: str, argv: list[str], page: str | None = None) -> tuple[dict, str]:
+        # the daemon redirects this process's stdout while it works, so the output is collected separately
+        output = io.StringIO()
+        reply = client.request({"command": command, "argv": argv, "page": page, "cwd": os.getcwd()}, output)
+        return reply, output.getvalue()
+
+    def test_builds_reuse_the_warm_builder(self):
+        reply, output = self.request("build", ["/base"])
+        self.assertEqual(reply, {"exit": 0})
+        self.assertEqual(output.count("Generating page"), 2)
+        with open(self.path("docs", "index.html")) as f:
+            self.assertIn('<a href="/base/about">', f.read())
+
+        template = self.created[0].template[1]
+        reply, output = self.request("build", ["/base"])
+        self.assertEqual(output.count("Skipping unchanged page"), 2)
+        self.assertEqual(len(self.created), 1)
+        self.assertIs(self.created[0].template[1], template)
+
+        # a different configuration gets its own builder
+        self.request("build", ["/other"])
+        self.assertEqual(len(self.created), 2)
+
+    def test_render_page(self):
+        reply, output = self.request("render", ["/base"], self.path("content", "index.md"))
+        self.assertEqual(reply, {"exit": 0})
+        self.assertEqual(output, '<html><title>Home</title><body><div><h1>Home</h1>'
+                                 '<p><a href="/base/about">about</a></p></div></body></html>')
+        self.assertFalse(os.path.exists(self.path("docs")))
+
+    def test_errors_and_fallbacks(self):
+        reply, output = self.request("build", ["--jobs", "x"])
+        self.assertEqual(reply, {"exit": 2})
+        self.assertIn("invalid int value", output)
+        reply, _ = self.request("build", ["/base", "--serve"])
+        self.assertIn("fallback", reply)
+        reply, output = self.request("render", ["/base"], self.path("content", "missing.md"))
+        self.assertEqual(reply, {"exit": 1})
+        self.assertIn("FileNotFoundError", output)
+
+    def test_merge_is_not_a_build(self):
+        reply, _ = self.request("build", ["merge", "shards/0"])
+        self.assertIn("fallback", reply)
+        self.assertEqual(self.created, [])
+        with mock.patch.object(client, "run_in_process", return_value=0) as run_in_process:
+            self.assertEqual(client.client(["merge", "shards/0"]), 0)
+        run_in_process.assert_called_once_with("build", ["merge", "shards/0"])
+
+    def test_no_daemon(self):
+        with mock.patch.object(client, "SOCKET_PATH", self.path("missing.sock")):
+            self.assertIsNone(client.request({"command": "ping"}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import os
+
+from fixtures import TempDirTestCase
+from depgraph import SiteResolver, extract_references, dependents
+from manifest import BuildManifest
+
+class TestDepGraph(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[a](/a) [b](/b) ![logo](/images/logo.png)")
+        self.write(os.path.join(self.content, "a", "index.md"), "# A\n\n[home](/)")
+        self.write(os.path.join(self.content, "b", "index.md"), "# B\n\nno links")
+        self.write(os.path.join(self.static, "images", "logo.png"), "png")
+        self.resolver = SiteResolver(self.content, self.static)
+
+    def build(self, manifest: BuildManifest) -> list[str]:
+        # record every page the way generate_pages_recursive does; return the ones rebuilt
+        rebuilt = []
+        for name in ("index.md", os.path.join("a", "index.md"), os.path.join("b", "index.md")):
+            source = os.path.normpath(os.path.join(self.content, name))
+            if not os.path.exists(source):
+                continue
+            output = os.path.join(self.docs, name.replace(".md", ".html"))
+            if manifest.is_fresh(source, output, "t", "/"):
+                continue
+            self.write(output, "html")
+            manifest.record_page(source, output, "t", "/")
+            rebuilt.append(name)
+        return rebuilt
+
+    def new_manifest(self) -> BuildManifest:
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        manifest.resolver = SiteResolver(self.content, self.static)
+        return manifest
+
+    def test_extract_references_skips_code(self):
+        md = "[link](/x) ![img](/y.png)\n\n```\n[not a link](/z)\n```"
+        self.assertEqual(extract_references(md.split("\n")), (["/x"], ["/y.png"]))
+
+    def test_resolve_link(self):
+        self.assertEqual(self.resolver.resolve_link("/"), os.path.join(self.content, "index.md"))
+        self.assertEqual(self.resolver.resolve_link("/a#top"), os.path.join(self.content, "a", "index.md"))
+        self.assertIsNone(self.resolver.resolve_link("/missing"))
+        self.assertIsNone(self.resolver.resolve_link("https://example.com/a"))
+
+    def test_unchanged_site_rebuilds_nothing(self):
+        manifest = self.new_manifest()
+        self.assertEqual(len(self.build(manifest)), 3)
+        manifest.save()
+        self.assertEqual(self.build(self.new_manifest()), [])
+
+    def test_renamed_page_rebuilds_only_linkers(self):
+        manifest = self.new_manifest()
+        self.build(manifest)
+        manifest.save()
+
+        os.rename(os.path.join(self.content, "b"), os.path.join(self.content, "c"))
+        self.assertEqual(self.build(self.new_manifest()), ["index.md"])
+
+    def test_changed_image_rebuilds_only_embedders(self):
+        manifest = self.new_manifest()
+        self.build(manifest)
+        manifest.save()
+
+        self.write(os.path.join(self.static, "images", "logo.png"), "new png")
+        self.assertEqual(self.build(self.new_manifest()), ["index.md"])
+
+    def test_dependents(self):
+        manifest = self.new_manifest()
+        self.build(manifest)
+        home = os.path.join(self.content, "index.md")
+        self.assertEqual(dependents(manifest.pages, os.path.join(self.content, "a", "index.md")), [home])
+        self.assertEqual(dependents(manifest.pages, os.path.join(self.static, "images", "logo.png")), [home])
+
+if __name__ == "__main__":
+    unittest.main()
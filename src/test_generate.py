@@ -0,0 +1,81 @@
+import unittest
+import contextlib
+import io
+import os
+
+from fixtures import TempDirTestCase, read_tree
+from functions import discover_pages, generate_pages_recursive
+from sink import MemorySink
+
+TEMPLATE = """<html><head><title>{{ Title }}</title><link href="/index.css" /></head>
+<body>{{ Content }}</body></html>"""
+
+PAGES = {
+    "index.md": "# Home\n\nSee [the blog](/blog/first) and ![logo](/images/logo.png).",
+    "blog/first/index.md": "# First\n\nSome **bold** text.\n\n- one\n- two",
+    "blog/second/index.md": "# Second\n\n```\ncode here\n```",
+    "notes.txt": "not markdown",
+}
+
+class TestGenerate(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.template = self.write("template.html", TEMPLATE)
+        for rel_path, text in PAGES.items():
+            self.write(os.path.join(self.content, rel_path), text)
+
+    def build(self, dest_name: str, **kwargs) -> tuple[dict[str, bytes], str]:
+        dest = os.path.join(self.tmp.name, dest_name)
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            generate_pages_recursive(self.content, self.template, dest, "/base", **kwargs)
+        return read_tree(dest), log.getvalue().replace(dest, "<dest>")
+
+    def test_discover_pages_sorted(self):
+        pages = discover_pages(self.content, "out")
+        self.assertEqual(
+            pages,
+            [
+                (os.path.join(self.content, "blog", "first", "index.md"), os.path.join("out", "blog", "first", "index.html")),
+                (os.path.join(self.content, "blog", "second", "index.md"), os.path.join("out", "blog", "second", "index.html")),
+                (os.path.join(self.content, "index.md"), os.path.join("out", "index.html")),
+            ],
+        )
+
+    def test_basepath_rewrite(self):
+        tree, _ = self.build("serial")
+        html = tree["index.html"].decode()
+        self.assertIn('<link href="/base/index.css" />', html)
+        self.assertIn('<a href="/base/blog/first">the blog</a>', html)
+        self.assertIn('<img src="/base/images/logo.png" alt="logo"></img>', html)
+
+    def test_streaming_matches_serial(self):
+        serial_tree, _ = self.build("serial")
+        streamed_tree, _ = self.build("streamed", stream_threshold=0)
+        self.assertEqual(serial_tree, streamed_tree)
+
+    def test_parallel_matches_serial(self):
+        serial_tree, serial_log = self.build("serial")
+        parallel_tree, parallel_log = self.build("parallel", jobs=2)
+        self.assertEqual(serial_tree, parallel_tree)
+        self.assertEqual(serial_log, parallel_log)
+
+    def build_in_memory(self, **kwargs) -> dict[str, bytes]:
+        sink = MemorySink()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, "out", "/base", sink=sink, **kwargs)
+        return {os.path.relpath(path, "out"): data for path, data in sink.files.items()}
+
+    def test_memory_sink_matches_disk(self):
+        serial_tree, _ = self.build("serial")
+        self.assertEqual(self.build_in_memory(), serial_tree)
+        self.assertEqual(self.build_in_memory(stream_threshold=0), serial_tree)
+        self.assertFalse(os.path.exists("out"))
+
+    def test_memory_sink_parallel(self):
+        serial_tree, _ = self.build("serial")
+        self.assertEqual(self.build_in_memory(jobs=2), serial_tree)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import io
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
 from textnode import TextNode, TextType
@@ -90,6 +91,38 @@ class TestHtmlNode(unittest.TestCase):
             node = ParentNode("p", None)
             node.to_html()
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+            ParentNode("ul", [ParentNode("li", [LeafNode(None, "item")])]),
+            LeafNode("img", "", {"src": "/a.png", "alt": "a"}),
+        ])
+        self.assertEqual(
+            "".join(node.iter_html()),
+            '<div><p><b>Bold</b> text</p><ul><li>item</li></ul><img src="/a.png" alt="a"></img></div>',
+        )
+
+    def test_write_html(self):
+        node = ParentNode("p", [LeafNode("i", "streamed"), LeafNode(None, " text")])
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), "<p><i>streamed</i> text</p>")
+
+    def test_to_html_deep_tree(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "deep</span>"))
+
+    def test_parent_props(self):
+        node = ParentNode("div", [LeafNode(None, "x")], {"class": "note"})
+        self.assertEqual(node.to_html(), '<div class="note">x</div>')
+
+    def test_nested_no_children(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", [ParentNode("p", None)]).to_html()
+
     # text node to html node function tests
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
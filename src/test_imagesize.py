@@ -0,0 +1,61 @@
+import unittest
+import os
+import struct
+import zlib
+
+from fixtures import TempDirTestCase
+from functions import markdown_to_html_node, annotate_images
+from imagesize import read_image_size, image_dimensions
+
+def png_bytes(width: int, height: int) -> bytes:
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    chunk = struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+    return b"\x89PNG\r\n\x1a\n" + chunk
+
+def jpeg_bytes(width: int, height: int) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xd9"
+
+class TestImageSize(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = self.tmp.name
+
+    def test_formats(self):
+        self.assertEqual(read_image_size(self.write("a.png", png_bytes(640, 480))), (640, 480))
+        self.assertEqual(read_image_size(self.write("a.jpg", jpeg_bytes(800, 600))), (800, 600))
+        self.assertEqual(read_image_size(self.write("a.gif", b"GIF89a" + struct.pack("<HH", 16, 32) + b"\x00")), (16, 32))
+        webp = b"RIFF" + struct.pack("<I", 22) + b"WEBPVP8X" + struct.pack("<I", 10) + b"\x00" * 4
+        webp += (99).to_bytes(3, "little") + (49).to_bytes(3, "little")
+        self.assertEqual(read_image_size(self.write("a.webp", webp)), (100, 50))
+        svg = b'<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 12"></svg>'
+        self.assertEqual(read_image_size(self.write("a.svg", svg)), (24, 12))
+
+    def test_unreadable(self):
+        self.assertIsNone(read_image_size(self.write("broken.png", b"not a png")))
+        self.assertIsNone(read_image_size(self.write("notes.txt", b"text")))
+
+    def test_dimensions_cached_by_hash(self):
+        self.write("images/a.png", png_bytes(10, 20))
+        cache = {}
+        self.assertEqual(image_dimensions(self.static, {"/images/a.png": "h1", "/notes.txt": "h2"}, cache),
+                         {"/images/a.png": (10, 20)})
+        self.assertEqual(cache, {"h1": [10, 20]})
+        # a cached hash is not read again, even if the file is gone
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.assertEqual(image_dimensions(self.static, {"/images/a.png": "h1"}, cache), {"/images/a.png": (10, 20)})
+        self.assertEqual(image_dimensions(self.static, {}, cache), {})
+        self.assertEqual(cache, {})
+
+    def test_annotate_images(self):
+        node = markdown_to_html_node("![a](/images/a.png) ![b](/images/b.png)")
+        annotate_images(node, {"/images/a.png": (10, 20)})
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><img src="/images/a.png" alt="a" width="10" height="20" loading="lazy" decoding="async"></img> '
+            '<img src="/images/b.png" alt="b" loading="lazy" decoding="async"></img></p></div>',
+        )
+
+if __name__ == "__main__":
+    unittest.main()
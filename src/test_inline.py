@@ -0,0 +1,92 @@
+import unittest
+import random
+
+from textnode import TextNode, TextType
+from functions import text_to_textnodes, text_to_textnodes_chained
+
+# inputs the chained pipeline handles without raising
+VALID_INPUTS = [
+    "",
+    "plain text only",
+    "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)",
+    "**bold** at the start",
+    "at the end **bold**",
+    "**a**_b_`c`",
+    "empty **** delimiters",
+    "**bold with _underscores_ inside**",
+    "_italic with `ticks` inside_",
+    "[link](/a) and [another](/b) and [third](/c)",
+    "![one](/1.png)![two](/2.png)",
+    "[link](/a)![image](/b.png)[link](/c)",
+    "an exclamation! and [a link](/x)",
+    "a lone [ bracket and a lone ! bang",
+    "[not a link] (because of the space)",
+    "[[nested](/x)",
+    "[![img](/i.png)](/href)",
+    "[](/empty-text)",
+    "![](/empty-alt.png)",
+    "a * single star is text",
+    "Here's the deal, **I like Tolkien**.",
+    "Disney _didn't ruin it_ (okay, but Amazon might have)",
+    "See **[the docs](/docs)** now",
+    "_[this post](/blog/tom)_",
+    "**bold ![image](/i.png) and a [link](/l) inside**",
+    "_an ![image](/i.png)_ and **[two](/2) [links](/3)**",
+]
+
+INVALID_INPUTS = [
+    "missing **closing",
+    "missing _closing",
+    "missing `closing",
+]
+
+FRAGMENTS = [
+    "word ", "two words ", "punctuation, (parens) ", "! ", "[ ", "] ", "* ",
+    "**bold** ", "_italic_ ", "`code` ", "****",
+    "[link](https://example.com/page) ", "![alt text](/images/a.png) ",
+    "[](/x)", "![](/y.png)",
+    "**[bold link](/b)** ", "_[italic link](/i)_ ", "**see ![alt](/a.png) here** ", "_around [x](/x) it_ ",
+]
+
+class TestInlineTokenizer(unittest.TestCase):
+    def test_matches_chained_pipeline(self):
+        for text in VALID_INPUTS:
+            with self.subTest(text=text):
+                self.assertEqual(text_to_textnodes(text), text_to_textnodes_chained(text))
+
+    def test_matches_chained_pipeline_random(self):
+        rng = random.Random(1234)
+        for _ in range(500):
+            text = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 30)))
+            with self.subTest(text=text):
+                self.assertEqual(text_to_textnodes(text), text_to_textnodes_chained(text))
+
+    def test_invalid_inputs_raise(self):
+        for text in INVALID_INPUTS:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    text_to_textnodes_chained(text)
+                with self.assertRaises(ValueError):
+                    text_to_textnodes(text)
+
+    def test_markers_inside_link_are_literal(self):
+        self.assertEqual(
+            text_to_textnodes("[snake_case_name](/a_b)"),
+            [TextNode("snake_case_name", TextType.LINK, "/a_b")],
+        )
+
+    def test_markers_inside_code_are_literal(self):
+        # the chained pipeline split on "**" before "`" and rejected this input
+        self.assertEqual(
+            text_to_textnodes("`code with **stars** inside`"),
+            [TextNode("code with **stars** inside", TextType.CODE)],
+        )
+
+    def test_many_links_linear(self):
+        text = "see [link](/x) " * 10000
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 20001)
+        self.assertEqual(nodes[1], TextNode("link", TextType.LINK, "/x"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+from unittest import mock
+
+import inventory
+from fixtures import TempDirTestCase
+from inventory import scan_tree
+
+class TestInventory(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        for path in ("index.md", "blog/tom/index.md", "blog/index.md", "z.md", "images/logo.png"):
+            self.write(path, path)
+
+    def age(self, seconds: int = 60) -> None:
+        # push every directory mtime back so its listing is trusted
+        for dirpath, _, _ in os.walk(self.root):
+            stat = os.stat(dirpath)
+            os.utime(dirpath, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 10**9))
+
+    def relative(self, scanned) -> list[str]:
+        return [os.path.relpath(path, self.root) for path in scanned.files]
+
+    def test_sorted_walk_order(self):
+        scanned = scan_tree(self.root, {})
+        self.assertEqual(self.relative(scanned),
+                         ["blog/index.md", "blog/tom/index.md", "images/logo.png", "index.md", "z.md"])
+        self.assertEqual(scanned.files[os.path.join(self.root, "z.md")][1], len("z.md"))
+        self.assertEqual(scanned.dirs[0], self.root)
+
+    def test_unchanged_directories_are_not_listed_again(self):
+        recorded = {}
+        self.age()
+        scan_tree(self.root, recorded)
+        self.write("blog/index.md", "edited in place")
+        with mock.patch.object(inventory.os, "scandir", side_effect=AssertionError("rescanned")):
+            scanned = scan_tree(self.root, recorded)
+        # an edit in place is still seen through the file's own stat
+        self.assertEqual(scanned.files[os.path.join(self.root, "blog", "index.md")][1], len("edited in place"))
+
+    def test_changed_directory_is_rescanned(self):
+        recorded = {}
+        self.age()
+        scan_tree(self.root, recorded)
+        self.write("blog/new.md", "new")
+        os.remove(os.path.join(self.root, "z.md"))
+        scanned = scan_tree(self.root, recorded)
+        self.assertIn("blog/new.md", self.relative(scanned))
+        self.assertNotIn("z.md", self.relative(scanned))
+
+    def test_recent_directories_are_not_trusted(self):
+        recorded = {}
+        scan_tree(self.root, recorded)
+        self.assertIsNone(recorded[self.root]["mtime_ns"])
+
+    def test_removed_directories_are_forgotten(self):
+        recorded = {}
+        scan_tree(self.root, recorded)
+        os.remove(os.path.join(self.root, "blog", "tom", "index.md"))
+        os.rmdir(os.path.join(self.root, "blog", "tom"))
+        scan_tree(self.root, recorded)
+        self.assertNotIn(os.path.join(self.root, "blog", "tom"), recorded)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import os
+
+from fixtures import TempDirTestCase
+from manifest import BuildManifest, hash_file
+
+class TestManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = self.write("index.md", "# Title\n")
+        self.output = self.write("index.html", "<h1>Title</h1>")
+        self.manifest_path = self.path(".build", "manifest.json")
+
+    def test_unknown_page_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        self.assertFalse(manifest.is_fresh(self.source, self.output, "t", "/"))
+
+    def test_recorded_page_is_fresh_after_reload(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record_page(self.source, self.output, "t", "/")
+        manifest.save()
+
+        reloaded = BuildManifest(self.manifest_path)
+        self.assertTrue(reloaded.is_fresh(self.source, self.output, "t", "/"))
+        self.assertFalse(reloaded.is_fresh(self.source, self.output, "other template", "/"))
+        self.assertFalse(reloaded.is_fresh(self.source, self.output, "t", "/prefix"))
+
+    def test_changed_source_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record_page(self.source, self.output, "t", "/")
+        with open(self.source, "w") as f:
+            f.write("# Another title\n")
+        self.assertFalse(manifest.is_fresh(self.source, self.output, "t", "/"))
+
+    def test_touched_source_is_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record_page(self.source, self.output, "t", "/")
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(manifest.is_fresh(self.source, self.output, "t", "/"))
+
+    def test_source_snapshot_is_recorded_as_given(self):
+        # the page was rendered from an earlier version of the source
+        manifest = BuildManifest(self.manifest_path)
+        stat = os.stat(self.source)
+        manifest.record_page(self.source, self.output, "t", "/",
+                             source_snapshot=("old", stat.st_mtime_ns - 1, stat.st_size))
+        self.assertFalse(manifest.is_fresh(self.source, self.output, "t", "/"))
+
+    def test_missing_output_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record_page(self.source, self.output, "t", "/")
+        os.remove(self.output)
+        self.assertFalse(manifest.is_fresh(self.source, self.output, "t", "/"))
+
+    def test_prune_removes_stale_outputs(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record_page(self.source, self.output, "t", "/")
+        manifest.save()
+
+        next_build = BuildManifest(self.manifest_path)
+        self.assertEqual(next_build.prune(), [self.output])
+        self.assertFalse(os.path.exists(self.output))
+        self.assertEqual(next_build.pages, {})
+
+    def test_hash_file(self):
+        self.assertEqual(hash_file(self.source), hash_file(self.source))
+        self.assertNotEqual(hash_file(self.source), hash_file(self.output))
+
+if __name__ == "__main__":
+    unittest.main()
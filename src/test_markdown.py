@@ -100,6 +100,22 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
     
+    def test_code_with_blank_lines(self):
+        md = """
+```
+first line
+
+second line
+```
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>first line\n\nsecond line\n</code></pre></div>",
+        )
+
     def test_extract_title(self):
         md = "./content/index.md"
         title = extract_title(md)
@@ -0,0 +1,71 @@
+import unittest
+
+from functions import markdown_to_html_node, iter_page, render_page
+from minify import minify_markup, minify_tree
+from template import Template
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <!-- page head -->
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+  </head>
+  <body>
+    <pre>
+  keep   this
+    </pre>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+MARKDOWN = """# A   title
+
+Some   text
+across lines with ![an image](/a.png) and `inline   code`.
+
+```
+def f():
+
+    return  1
+```
+
+- item   one
+- item two  """
+
+class TestMinify(unittest.TestCase):
+    def test_minify_markup(self):
+        self.assertEqual(
+            minify_markup(TEMPLATE),
+            '<!doctype html><html><head><meta charset="utf-8"><title>{{ Title }}</title></head><body>'
+            "<pre>\n  keep   this\n    </pre><article>{{ Content }}</article></body></html>",
+        )
+
+    def test_minify_tree_keeps_code(self):
+        node = markdown_to_html_node(MARKDOWN)
+        minify_tree(node)
+        html = node.to_html()
+        self.assertIn("<h1>A title</h1>", html)
+        self.assertIn("<p>Some text across lines with ", html)
+        self.assertIn('<img src="/a.png" alt="an image"> and <code>inline   code</code>.</p>', html)
+        self.assertIn("<pre><code>def f():\n\n    return  1\n</code></pre>", html)
+        self.assertIn("<li>item one</li><li>item two</li>", html)
+
+    def test_minified_page_matches_streamed(self):
+        template = Template(TEMPLATE, "/base", minify=True)
+        self.assertEqual(render_page(MARKDOWN, template), "".join(iter_page(MARKDOWN, template)))
+
+    def test_minified_page_is_smaller(self):
+        plain = render_page(MARKDOWN, Template(TEMPLATE, "/base"))
+        minified = render_page(MARKDOWN, Template(TEMPLATE, "/base", minify=True))
+        self.assertLess(len(minified), len(plain))
+        self.assertIn('<img src="/base/a.png" alt="an image">', minified)
+        self.assertNotIn("</img>", minified)
+
+    def test_template_output_hash(self):
+        self.assertEqual(Template(TEMPLATE, "/").output_hash("abc"), "abc")
+        self.assertNotEqual(Template(TEMPLATE, "/", minify=True).output_hash("abc"), "abc")
+
+if __name__ == "__main__":
+    unittest.main()
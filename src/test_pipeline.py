@@ -0,0 +1,92 @@
+import unittest
+import contextlib
+import io
+import os
+
+from fixtures import TempDirTestCase, TEMPLATE
+from functions import generate_pages, write_page
+from manifest import hash_file
+from pipeline import AsyncWriter, decode_source, prefetch, read_source
+from sink import DirectorySink, MemorySink
+from template import Template
+
+class FailingSink(MemorySink):
+    def open(self, path: str):
+        raise OSError(f"cannot write {path}")
+
+class TestPipeline(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.path("template.html")
+        self.write("template.html", TEMPLATE.encode())
+
+    def test_decode_source_translates_newlines(self):
+        self.assertEqual(decode_source("# Tïtle\r\n\r\ntext\rmore".encode()), "# Tïtle\n\ntext\nmore")
+
+    def test_prefetch_keeps_order(self):
+        pages = [(self.write(f"{i}.md", b"x" * i), f"{i}.html") for i in range(40)]
+        fetched = list(prefetch(pages, max_size=30, depth=4, threads=3))
+        self.assertEqual([(src, dst) for src, dst, _, _ in fetched], pages)
+        self.assertEqual(fetched[5][2], b"xxxxx")
+        self.assertEqual(fetched[5][3].st_size, 5)
+        # too large to prefetch, left for the renderer to stream
+        self.assertIsNone(fetched[31][2])
+
+    def test_read_source_stat_describes_bytes_read(self):
+        src = self.write("a.md", b"# A\n")
+        data, stat = read_source(src, 1 << 20)
+        self.write("a.md", b"# A, edited after the read\n")
+        self.assertEqual((data, stat.st_size), (b"# A\n", 4))
+
+    def test_writer_raises_first_error(self):
+        with self.assertRaises(OSError):
+            with AsyncWriter(FailingSink()) as writer:
+                writer.write_page("docs/index.html", ["<html>", "</html>"])
+
+    def test_writer_streams_pages_in_chunks(self):
+        sink = MemorySink()
+        with AsyncWriter(sink, depth=2, chunk_size=10) as writer:
+            writer.write_page("docs/a.html", (f"<p>{i}</p>" for i in range(100)))
+            writer.write_page("docs/b.html", [])
+        self.assertEqual(sink.read("docs/a.html"), "".join(f"<p>{i}</p>" for i in range(100)).encode())
+        self.assertEqual(sink.read("docs/b.html"), b"")
+
+    def test_failed_page_keeps_previous_output(self):
+        path = self.write("docs/index.html", "<html>good</html>")
+
+        def fragments():
+            yield "<html>" + "x" * 100
+            raise ValueError("render failed")
+
+        with self.assertRaises(ValueError):
+            with AsyncWriter(DirectorySink(), chunk_size=10) as writer:
+                writer.write_page(path, fragments())
+        with open(path) as f:
+            self.assertEqual(f.read(), "<html>good</html>")
+        self.assertEqual(os.listdir(self.path("docs")), ["index.html"])
+
+    def test_pipelined_build_matches_write_page(self):
+        template = Template.from_file(self.template, "/base")
+        pages = [
+            (self.write("a.md", b"# A\r\n\r\n[link](/b)"), self.path("a.html")),
+            (self.write("b.md", b"# B\n\n" + b"- item\n" * 50), self.path("b.html")),
+        ]
+        expected = MemorySink()
+        for src, dst in pages:
+            write_page(src, template, dst, sink=expected)
+        for threshold in (1 << 20, 16):
+            sink = MemorySink()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages(pages, self.template, "/base", stream_threshold=threshold, sink=sink)
+            self.assertEqual(sink.files, expected.files)
+
+    def test_write_page_returns_source_snapshot(self):
+        template = Template.from_file(self.template, "/base")
+        src = self.write("a.md", b"# A\r\n\r\n" + b"- item\n" * 50)
+        stat = os.stat(src)
+        for threshold in (1 << 20, 16):
+            snapshot = write_page(src, template, self.path("a.html"), threshold, sink=MemorySink())
+            self.assertEqual(snapshot, (hash_file(src), stat.st_mtime_ns, stat.st_size))
+
+if __name__ == "__main__":
+    unittest.main()
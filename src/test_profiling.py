@@ -0,0 +1,52 @@
+import unittest
+import contextlib
+import io
+import os
+
+from fixtures import TempDirTestCase
+from functions import generate_pages_recursive
+from profiling import BuildProfiler, PAGE_STAGES
+
+class TestProfiling(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        for name, text in (("a", "# A\n\nshort"), ("b", "# B\n\n" + "a **long** page\n\n" * 200)):
+            self.write(os.path.join(self.content, name, "index.md"), text)
+
+    def build(self, profiler: BuildProfiler, dest_name: str) -> str:
+        dest = os.path.join(self.tmp.name, dest_name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, dest, "", jobs=4, profiler=profiler)
+        return dest
+
+    def test_profiled_build_records_every_stage(self):
+        profiler = BuildProfiler()
+        self.build(profiler, "docs")
+        profiler.stop()
+
+        self.assertEqual(len(profiler.pages), 2)
+        for stages in profiler.pages.values():
+            self.assertEqual(tuple(stages), PAGE_STAGES)
+            for record in stages.values():
+                self.assertGreaterEqual(record["wall_s"], 0)
+                self.assertIn("net_blocks", record)
+                self.assertIn("peak_bytes", record)
+
+        report = profiler.report(top=1)
+        self.assertEqual(report["page_count"], 2)
+        self.assertEqual(report["slowest"][0]["page"], os.path.join(self.content, "b", "index.md"))
+
+    def test_profiled_output_matches_plain_build(self):
+        profiler = BuildProfiler(track_memory=False)
+        profiled = self.build(profiler, "profiled")
+        plain = os.path.join(self.tmp.name, "plain")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, plain, "")
+        for name in ("a", "b"):
+            with open(os.path.join(profiled, name, "index.html")) as f1, open(os.path.join(plain, name, "index.html")) as f2:
+                self.assertEqual(f1.read(), f2.read())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import gzip
+import http.client
+import os
+import threading
+
+from fixtures import TempDirTestCase
+from serve import PreviewSite, make_server
+
+TEMPLATE = '<html><head><link href="/index.css" rel="stylesheet" /><title>{{ Title }}</title></head><body>{{ Content }}</body></html>'
+
+class TestPreviewServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        self.write(self.template, TEMPLATE)
+        self.page = os.path.join(self.content, "blog", "post", "index.md")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post)")
+        self.write(self.page, "# Post\n\n" + "A long paragraph. " * 100)
+        self.write(os.path.join(self.static, "index.css"), "body { color: red; }")
+        self.write(os.path.join(root, "secret.txt"), "secret")
+
+        self.site = PreviewSite(self.content, self.static, self.template, "/site")
+        self.server = make_server(self.site, "127.0.0.1", 0)
+        self.server.RequestHandlerClass.log_message = lambda *args: None
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+        self.thread.start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path: str, headers: dict | None = None) -> tuple[http.client.HTTPResponse, bytes]:
+        self.conn.request("GET", path, headers=headers or {})
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_renders_page_with_basepath(self):
+        response, body = self.get("/site/")
+        self.assertEqual(response.status, 200)
+        self.assertIn(b'<a href="/site/blog/post">post</a>', body)
+        self.assertIn(b'<link href="/site/index.css"', body)
+
+    def test_static_file(self):
+        response, body = self.get("/site/index.css")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/css")
+        self.assertEqual(body, b"body { color: red; }")
+
+    def test_not_found(self):
+        self.assertEqual(self.get("/site/missing")[0].status, 404)
+        self.assertEqual(self.get("/index.css")[0].status, 404)
+        self.assertEqual(self.get("/site/../secret.txt")[0].status, 404)
+
+    def test_etag_not_modified(self):
+        response, _ = self.get("/site/blog/post")
+        etag = response.getheader("ETag")
+        response, body = self.get("/site/blog/post", {"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+
+    def test_edit_changes_etag(self):
+        response, _ = self.get("/site/blog/post")
+        etag = response.getheader("ETag")
+        self.write(self.page, "# Post\n\nedited")
+        os.utime(self.page, ns=(1, 1))
+        response, body = self.get("/site/blog/post", {"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"edited", body)
+
+    def test_cached_bytes_reused(self):
+        self.get("/site/blog/post")
+        cached = self.site.responses["/site/blog/post"]
+        self.get("/site/blog/post")
+        self.assertIs(self.site.responses["/site/blog/post"], cached)
+
+    def test_gzip(self):
+        _, plain = self.get("/site/blog/post")
+        response, body = self.get("/site/blog/post", {"Accept-Encoding": "gzip"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body), plain)
+        self.assertLess(len(body), len(plain))
+
+    def test_keep_alive(self):
+        # HTTP/1.1 keep-alive: several round trips over the same socket
+        for _ in range(3):
+            self.assertEqual(self.get("/site/")[0].status, 200)
+        self.assertIsNotNone(self.conn.sock)
+
+if __name__ == "__main__":
+    unittest.main()
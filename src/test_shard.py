@@ -0,0 +1,58 @@
+import unittest
+import contextlib
+import io
+import os
+
+from fixtures import TempDirTestCase, TEMPLATE, read_tree
+from build import SiteBuilder
+from shard import parse_shard, shard_of, select_shard, merge_shards, SHARD_MANIFEST
+
+class TestShard(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        for name in ("index", "about/index", "blog/a/index", "blog/b/index", "blog/c/index", "contact/index"):
+            self.write(f"content/{name}.md", f"# {name}\n\n[home](/)")
+
+    def build(self, dest: str, shard: tuple[int, int] | None = None) -> str:
+        name = dest if shard is None else f"{dest}-{shard[0]}"
+        builder = SiteBuilder(self.content, self.path("static"), self.path("template.html"), self.path(name),
+                              "/base", self.path(".build", f"{name}.json"), shard=shard)
+        with contextlib.redirect_stdout(io.StringIO()):
+            builder.build()
+        return self.path(name)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/8"), (2, 8))
+        for spec in ("8/8", "2", "a/b", "-1/3"):
+            with self.assertRaises(ValueError):
+                parse_shard(spec)
+
+    def test_partition_is_stable_and_complete(self):
+        self.assertEqual(shard_of("blog/a/index.md", 4), shard_of("blog/a/index.md", 4))
+        pages = [(self.path("content", f"{i}.md"), f"{i}.html") for i in range(100)]
+        shards = [select_shard(pages, self.content, (index, 3)) for index in range(3)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(pages))
+        self.assertTrue(all(shards))
+
+    def test_merged_shards_match_single_build(self):
+        expected = read_tree(self.build("docs"))
+        shard_dirs = [self.build("shard", (index, 3)) for index in range(3)]
+        self.assertEqual(merge_shards(shard_dirs, self.path("merged")), len(expected))
+        self.assertEqual(read_tree(self.path("merged")), expected)
+        self.assertNotIn(SHARD_MANIFEST, os.listdir(self.path("merged")))
+
+    def test_merge_refuses_incomplete_or_colliding_shards(self):
+        shard_dirs = [self.build("shard", (index, 2)) for index in range(2)]
+        with self.assertRaisesRegex(ValueError, "do not cover"):
+            merge_shards(shard_dirs[:1], self.path("merged"))
+        self.write("shard-1/index.css", "body {}")
+        self.build("shard", (1, 2))
+        with self.assertRaisesRegex(ValueError, "index.css is written by both"):
+            merge_shards(shard_dirs, self.path("merged"))
+        self.assertFalse(os.path.exists(self.path("merged")))
+
+if __name__ == "__main__":
+    unittest.main()
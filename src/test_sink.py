@@ -0,0 +1,114 @@
+import unittest
+import contextlib
+import io
+import os
+import tarfile
+
+from build import SiteBuilder
+from fixtures import TempDirTestCase
+from sink import DirectorySink, MemorySink, TargetSink
+
+class TestSink(TempDirTestCase):
+
+    def fill(self, sink) -> None:
+        with sink.open(os.path.join("docs", "blog", "index.html")) as f:
+            f.writelines(["<p>", "héllo", "</p>"])
+        sink.write_bytes(os.path.join("docs", "index.html"), b"<html></html>")
+
+    def test_memory_sink(self):
+        sink = MemorySink()
+        self.fill(sink)
+        self.assertEqual(sink.read("docs/blog/index.html"), "<p>héllo</p>".encode("utf-8"))
+        self.assertEqual(sorted(sink.files), [os.path.join("docs", "blog", "index.html"), os.path.join("docs", "index.html")])
+
+    def test_failed_page_keeps_previous_output(self):
+        path = os.path.join(self.tmp.name, "docs", "index.html")
+        targets = [("/prod", os.path.join(self.tmp.name, "docs")), ("/staging", os.path.join(self.tmp.name, "staging"))]
+        for sink in (DirectorySink(), TargetSink(targets), MemorySink()):
+            with sink.open(path) as f:
+                f.write("<html>good</html>")
+            with self.assertRaises(ValueError):
+                with sink.open(path) as f:
+                    f.write("<html>half")
+                    raise ValueError("render failed")
+            if isinstance(sink, MemorySink):
+                self.assertEqual(sink.read(path), b"<html>good</html>")
+                continue
+            with open(path) as f:
+                self.assertEqual(f.read(), "<html>good</html>")
+            self.assertEqual(os.listdir(os.path.dirname(path)), ["index.html"])
+
+    def test_directory_sink_creates_directories(self):
+        src = os.path.join(self.tmp.name, "logo.png")
+        with open(src, "wb") as f:
+            f.write(b"png")
+        dst = os.path.join(self.tmp.name, "docs", "images", "logo.png")
+        DirectorySink().copy_file(src, dst)
+        with open(dst, "rb") as f:
+            self.assertEqual(f.read(), b"png")
+
+    def test_write_tar_is_reproducible(self):
+        sink = MemorySink()
+        self.fill(sink)
+        first = os.path.join(self.tmp.name, "first.tar.gz")
+        second = os.path.join(self.tmp.name, "second.tar.gz")
+        self.assertEqual(sink.write_tar(first, "docs"), 2)
+        sink.write_tar(second, "docs")
+        with open(first, "rb") as a, open(second, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+        with tarfile.open(first) as tar:
+            self.assertEqual(tar.getnames(), [os.path.join("blog", "index.html"), "index.html"])
+            self.assertEqual(tar.extractfile("index.html").read(), b"<html></html>")
+
+    def test_target_sink_fills_in_basepaths(self):
+        root = self.tmp.name
+        targets = [("/prod", os.path.join(root, "docs")), ("/staging", os.path.join(root, "staging"))]
+        sink = TargetSink(targets)
+        with sink.open(os.path.join(root, "docs", "blog", "index.html")) as f:
+            f.writelines(["<p>", f'<a href="{sink.marker}/blog">blog</a>', "</p>"])
+        with open(os.path.join(root, "docs", "blog", "index.html")) as f:
+            self.assertEqual(f.read(), '<p><a href="/prod/blog">blog</a></p>')
+        with open(os.path.join(root, "staging", "blog", "index.html")) as f:
+            self.assertEqual(f.read(), '<p><a href="/staging/blog">blog</a></p>')
+
+        src = os.path.join(root, "logo.png")
+        with open(src, "wb") as f:
+            f.write(b"png")
+        sink.copy_file(src, os.path.join(root, "docs", "images", "logo.png"))
+        self.assertTrue(os.path.samefile(os.path.join(root, "docs", "images", "logo.png"),
+                                         os.path.join(root, "staging", "images", "logo.png")))
+
+    def test_multi_target_build(self):
+        root = self.tmp.name
+        paths = {
+            "template.html": '<html><link href="/index.css" />{{ Title }}{{ Content }}</html>',
+            "content/index.md": "# Home\n\n[about](/about)",
+            "content/about/index.md": "# About",
+            "static/index.css": "body {}",
+        }
+        for path, text in paths.items():
+            path = os.path.join(root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(text)
+        docs, staging = os.path.join(root, "docs"), os.path.join(root, "staging")
+        builder = SiteBuilder(os.path.join(root, "content"), os.path.join(root, "static"),
+                              os.path.join(root, "template.html"), docs, "/prod",
+                              os.path.join(root, "manifest.json"), targets=[("/staging", staging)])
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            builder.build()
+        self.assertEqual(log.getvalue().count("Generating page"), 2)
+        with open(os.path.join(docs, "index.html")) as f:
+            self.assertEqual(f.read(), '<html><link href="/prod/index.css" />Home<div><h1>Home</h1>'
+                                       '<p><a href="/prod/about">about</a></p></div></html>')
+        with open(os.path.join(staging, "index.html")) as f:
+            self.assertIn('<a href="/staging/about">', f.read())
+        self.assertTrue(os.path.samefile(os.path.join(docs, "index.css"), os.path.join(staging, "index.css")))
+
+        os.remove(os.path.join(root, "content", "about", "index.md"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            builder.build()
+        self.assertFalse(os.path.exists(os.path.join(staging, "about")))
+
+if __name__ == "__main__":
+    unittest.main()
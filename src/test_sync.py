@@ -0,0 +1,84 @@
+import unittest
+import contextlib
+import io
+import os
+
+from fixtures import TempDirTestCase
+from sync import sync_dir, clone_file, needs_copy
+
+class TestSync(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "docs")
+        self.write(os.path.join(self.src, "index.css"), "body {}")
+        self.write(os.path.join(self.src, "images", "a.png"), "png bytes")
+
+    def read(self, path: str) -> str:
+        with open(path, "r") as f:
+            return f.read()
+
+    def sync(self, tracked: dict, **kwargs) -> dict[str, int]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return sync_dir(self.src, self.dst, tracked, **kwargs)
+
+    def test_first_sync_copies_everything(self):
+        tracked = {}
+        stats = self.sync(tracked)
+        self.assertEqual(stats, {"copied": 2, "unchanged": 0, "removed": 0})
+        self.assertEqual(self.read(os.path.join(self.dst, "images", "a.png")), "png bytes")
+        self.assertEqual(len(tracked), 2)
+
+    def test_second_sync_copies_nothing(self):
+        tracked = {}
+        self.sync(tracked)
+        stats = self.sync(tracked)
+        self.assertEqual(stats, {"copied": 0, "unchanged": 2, "removed": 0})
+
+    def test_changed_file_is_copied(self):
+        tracked = {}
+        self.sync(tracked)
+        self.write(os.path.join(self.src, "index.css"), "body { color: red; }")
+        stats = self.sync(tracked)
+        self.assertEqual(stats["copied"], 1)
+        self.assertEqual(self.read(os.path.join(self.dst, "index.css")), "body { color: red; }")
+
+    def test_orphans_removed_generated_pages_kept(self):
+        tracked = {}
+        self.sync(tracked)
+        page = os.path.join(self.dst, "index.html")
+        self.write(page, "<html></html>")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+
+        stats = self.sync(tracked)
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_checksum_ignores_touched_files(self):
+        tracked = {}
+        self.sync(tracked)
+        src_file = os.path.join(self.src, "index.css")
+        stat = os.stat(src_file)
+        os.utime(src_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(needs_copy(src_file, os.path.join(self.dst, "index.css")))
+        self.assertFalse(needs_copy(src_file, os.path.join(self.dst, "index.css"), checksum=True))
+
+    def test_hardlink(self):
+        tracked = {}
+        self.sync(tracked, hardlink=True)
+        src_file = os.path.join(self.src, "index.css")
+        dst_file = os.path.join(self.dst, "index.css")
+        self.assertTrue(os.path.samefile(src_file, dst_file))
+
+    def test_clone_replaces_hardlink(self):
+        src_file = os.path.join(self.src, "index.css")
+        dst_file = os.path.join(self.dst, "index.css")
+        os.makedirs(self.dst)
+        os.link(src_file, dst_file)
+        clone_file(os.path.join(self.src, "images", "a.png"), dst_file)
+        self.assertEqual(self.read(src_file), "body {}")
+        self.assertEqual(self.read(dst_file), "png bytes")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from template import Template, rewrite_url
+from htmlnode import LeafNode, ParentNode
+from functions import rewrite_urls
+
+class TestTemplate(unittest.TestCase):
+    def test_render_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>", "")
+        self.assertEqual(
+            template.render({"Title": "Hello", "Content": "<p>hi</p>"}),
+            "<title>Hello</title><main><p>hi</p></main>",
+        )
+
+    def test_repeated_slot(self):
+        template = Template("{{ Title }}|{{ Title }}", "")
+        self.assertEqual(template.render({"Title": "x"}), "x|x")
+
+    def test_unknown_placeholder_is_left_as_written(self):
+        template = Template("<p>{{ Author }}</p>{{ Title }}", "")
+        self.assertEqual(template.render({"Title": "x"}), "<p>{{ Author }}</p>x")
+
+    def test_basepath_applies_to_template_urls(self):
+        template = Template('<link href="/index.css" /><img src="/a.png" /><a href="https://x.org">', "/base")
+        self.assertEqual(
+            template.render({}),
+            '<link href="/base/index.css" /><img src="/base/a.png" /><a href="https://x.org">',
+        )
+
+    def test_basepath_not_applied_to_slot_values(self):
+        template = Template("<main>{{ Content }}</main>", "/base")
+        html = template.render({"Content": '<code>href="/x"</code>'})
+        self.assertEqual(html, '<main><code>href="/x"</code></main>')
+
+    def test_iter_render_streams_nodes(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>", "")
+        content = ParentNode("p", [LeafNode("b", "hi")])
+        self.assertEqual(
+            "".join(template.iter_render({"Title": "Hello", "Content": content})),
+            "<title>Hello</title><main><p><b>hi</b></p></main>",
+        )
+
+    def test_missing_slot_value(self):
+        template = Template("{{ Title }}", "")
+        with self.assertRaises(KeyError):
+            template.render({})
+
+    def test_rewrite_url(self):
+        self.assertEqual(rewrite_url("/blog", "/base"), "/base/blog")
+        self.assertEqual(rewrite_url("https://boot.dev", "/base"), "https://boot.dev")
+
+    def test_rewrite_urls_nodes(self):
+        node = ParentNode("div", [
+            ParentNode("p", [
+                LeafNode("a", "blog", {"href": "/blog"}),
+                LeafNode(None, 'href="/not-a-link"'),
+            ]),
+            LeafNode("img", "", {"src": "/images/a.png", "alt": "a"}),
+        ])
+        rewrite_urls(node, "/base")
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><a href="/base/blog">blog</a>href="/not-a-link"</p><img src="/base/images/a.png" alt="a"></img></div>',
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,8 @@
 import unittest
 import re
 
-from textnode import TextNode, TextType, BlockType
-from functions import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type
+from textnode import TextNode, TextType, BlockType, MarkdownBlock
+from functions import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type, strip_markdown_prefix, scan_blocks, classify_block
 
 
 class TestTextNode(unittest.TestCase):
@@ -256,6 +256,69 @@ This is **bolded** paragraph
             ],
         )
 
+    def test_scan_blocks_matches_split(self):
+        documents = [
+            "",
+            "\n\n\n",
+            "one block",
+            "a\n\nb",
+            "a\n\n\nb",
+            "a\n\n\n\n\nb\n",
+            "  indented\n\n\tb  \n",
+            "a\n   \nb",
+            "# Title\n\n- one\n- two\n\n```\ncode\n```\n",
+        ]
+        for md in documents:
+            with self.subTest(md=md):
+                expected = markdown_to_blocks(md)
+                self.assertEqual([block.text for block in scan_blocks(md.split("\n"))], expected)
+                lines = md.splitlines(keepends=True)
+                self.assertEqual([block.text for block in scan_blocks(lines)], expected)
+
+    def test_classify_block_matches_legacy(self):
+        blocks = [
+            "- This is an unordered list\n- with items\n- and more items",
+            "# This is a heading",
+            "###### six\nsecond line",
+            "####### seven is a paragraph",
+            "This is a paragraph of text.\nOn two lines.",
+            "```This is a code block with _italic_ text\nThis is the same block on a new line```",
+            "```\ncode\n```",
+            ">This is a quote block\n> with a space\n>",
+            "1. This is an ordered list\n2. with items\n3. and more items",
+            "1. not ordered\n3. at all",
+            "- This is not an unordered list\n-- with items",
+            ">quote\n<not quote",
+            "```single line```",
+        ]
+        for block in blocks:
+            with self.subTest(block=block):
+                typed = classify_block(block)
+                block_type = block_to_block_type(block)
+                self.assertEqual(typed.block_type, block_type)
+                if block_type is BlockType.CODE:
+                    continue
+                expected = strip_markdown_prefix(block, block_type)
+                if block_type in (BlockType.ORDERED_LIST, BlockType.UNORDERED_LIST):
+                    self.assertEqual(typed.content, expected.split("\n"))
+                else:
+                    self.assertEqual(typed.content, expected)
+
+    def test_scan_blocks_keeps_fenced_code_intact(self):
+        md = "para\n\n```\nfirst\n\n\nsecond\n```\n\nafter"
+        self.assertEqual(
+            list(scan_blocks(md.split("\n"))),
+            [
+                MarkdownBlock(BlockType.PARAGRAPH, "para", "para"),
+                MarkdownBlock(BlockType.CODE, "```\nfirst\n\n\nsecond\n```", "first\n\n\nsecond\n"),
+                MarkdownBlock(BlockType.PARAGRAPH, "after", "after"),
+            ],
+        )
+
+    def test_scan_blocks_inline_code_line_is_not_a_fence(self):
+        md = "```inline```\n\nnext"
+        self.assertEqual([block.text for block in scan_blocks(md.split("\n"))], ["```inline```", "next"])
+
     def test_block_to_block_type(self):
         block_1 = "- This is an unordered list\n- with items\n- and more items"
         block_2 = "# This is a heading"
@@ -0,0 +1,129 @@
+import unittest
+import contextlib
+import io
+import os
+import sys
+import time
+
+from fixtures import TempDirTestCase, TEMPLATE
+from build import SiteBuilder
+from watch import PollingWatcher, InotifyWatcher, Watcher, watch
+
+class ScriptedWatcher(Watcher):
+    # replays edits, one per wait(), then stops the session like Ctrl-C would
+    def __init__(self, edits) -> None:
+        super().__init__([], [])
+        self.edits = iter(edits)
+
+    def wait(self, timeout: float | None = None) -> tuple[set[str], bool]:
+        edit = next(self.edits, None)
+        if edit is None:
+            raise KeyboardInterrupt
+        return {edit()}, False
+
+class TestWatch(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[a](/a) ![logo](/logo.png)")
+        self.write(os.path.join(self.content, "a", "index.md"), "# A\n\ntext")
+        self.write(os.path.join(self.content, "b", "index.md"), "# B\n\ntext")
+        self.write(os.path.join(self.static, "logo.png"), "png")
+
+    def builder(self) -> SiteBuilder:
+        return SiteBuilder(self.content, self.static, self.template, self.docs, "/",
+                           os.path.join(self.root, "manifest.json"))
+
+    def run_quietly(self, func, *args) -> list[str]:
+        # the pages a build or rebuild generated, taken from its log
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            func(*args)
+        return sorted(os.path.relpath(line.split()[3], self.content) for line in log.getvalue().splitlines()
+                      if line.startswith("Generating page"))
+
+    def test_rebuild_changed_page_only(self):
+        builder = self.builder()
+        self.assertEqual(len(self.run_quietly(builder.build)), 3)
+        page = os.path.join(self.content, "b", "index.md")
+        self.write(page, "# B\n\nnew text")
+        self.assertEqual(self.run_quietly(builder.rebuild, {page}), [os.path.join("b", "index.md")])
+        with open(os.path.join(self.docs, "b", "index.html")) as f:
+            self.assertIn("new text", f.read())
+
+    def test_rebuild_static_change_rebuilds_embedders(self):
+        builder = self.builder()
+        self.run_quietly(builder.build)
+        logo = os.path.join(self.static, "logo.png")
+        self.write(logo, "new png")
+        self.assertEqual(self.run_quietly(builder.rebuild, {logo}), ["index.md"])
+        with open(os.path.join(self.docs, "logo.png")) as f:
+            self.assertEqual(f.read(), "new png")
+
+    def test_rebuild_deleted_page(self):
+        builder = self.builder()
+        self.run_quietly(builder.build)
+        page = os.path.join(self.content, "a", "index.md")
+        os.remove(page)
+        # the home page links to /a, so it is regenerated as well
+        self.assertEqual(self.run_quietly(builder.rebuild, {page}), ["index.md"])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "a", "index.html")))
+        self.assertNotIn(page, builder.manifest.pages)
+
+    def test_rebuild_template_rebuilds_everything(self):
+        builder = self.builder()
+        self.run_quietly(builder.build)
+        self.write(self.template, TEMPLATE.replace("<body>", "<body class=x>"))
+        self.assertEqual(len(self.run_quietly(builder.rebuild, {self.template})), 3)
+
+    def test_failed_rebuild_keeps_watching(self):
+        builder = self.builder()
+        self.run_quietly(builder.build)
+        page = os.path.join(self.content, "a", "index.md")
+        edits = [lambda: self.write(page, "# A\n\nhalf typed **bold"),
+                 lambda: self.write(page, "# A\n\nhalf typed **bold**")]
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            watch(builder, watcher=ScriptedWatcher(edits))
+        self.assertIn('missing closing "**"', log.getvalue())
+        with open(os.path.join(self.docs, "a", "index.html")) as f:
+            self.assertIn("<b>bold</b>", f.read())
+
+    def check_watcher(self, watcher) -> None:
+        try:
+            page = os.path.join(self.content, "a", "index.md")
+            self.write(page, "# A\n\nchanged")
+            self.write(os.path.join(self.root, "unrelated.txt"), "ignored")
+            self.write(self.template, TEMPLATE + "\n")
+            paths, rescan = watcher.wait(timeout=2)
+            self.assertFalse(rescan)
+            self.assertEqual(paths, {page, self.template})
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        watcher = PollingWatcher([self.content, self.static], [self.template], interval=0.01)
+        # make sure the writes below land on a different mtime than the snapshot
+        time.sleep(0.01)
+        self.check_watcher(watcher)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_inotify_watcher(self):
+        self.check_watcher(InotifyWatcher([self.content, self.static], [self.template]))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_inotify_new_directory_requests_rescan(self):
+        watcher = InotifyWatcher([self.content], [])
+        try:
+            self.write(os.path.join(self.content, "c", "index.md"), "# C")
+            _, rescan = watcher.wait(timeout=2)
+            self.assertTrue(rescan)
+        finally:
+            watcher.close()
+
+if __name__ == "__main__":
+    unittest.main()
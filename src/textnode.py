@@ -17,6 +17,9 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 class TextNode():
+    # no per-instance __dict__ - large documents create millions of these
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str | None = None) -> None:
         self.text = text
         self.text_type = text_type
@@ -27,3 +30,25 @@ class TextNode():
 
     def __repr__(self) -> str:
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
+
+class MarkdownBlock():
+    # a typed block as produced by the block scanner: content is the text with the
+    # markdown prefix removed (a list of item texts for lists, the inner text for code)
+    __slots__ = ("block_type", "text", "content", "level")
+
+    def __init__(self, block_type: BlockType, text: str, content: str | list[str], level: int = 0) -> None:
+        self.block_type = block_type
+        self.text = text
+        self.content = content
+        self.level = level
+
+    def __eq__(self, other_block: 'MarkdownBlock') -> bool:
+        return (
+            self.block_type == other_block.block_type
+            and self.text == other_block.text
+            and self.content == other_block.content
+            and self.level == other_block.level
+        )
+
+    def __repr__(self) -> str:
+        return f"MarkdownBlock({self.block_type.value}, {self.text!r}, {self.content!r}, {self.level})"
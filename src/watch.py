@@ -0,0 +1,219 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+import traceback
+
+# inotify(7) flags
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct("iIII")
+
+# wait this long after the last event before rebuilding, but never longer than MAX_DELAY overall;
+# an editor save or a git checkout arrives as a burst of events and should cost one rebuild
+DEBOUNCE = 0.02
+MAX_DELAY = 0.2
+POLL_INTERVAL = 0.1
+
+class Watcher:
+    """Waits for changes under a set of directories and individual files."""
+
+    def __init__(self, directories: list[str], files: list[str]) -> None:
+        self.directories = [os.path.normpath(d) for d in directories]
+        self.files = [os.path.normpath(f) for f in files]
+
+    def read_events(self, timeout: float | None) -> tuple[set[str], bool]:
+        raise NotImplementedError
+
+    def wait(self, timeout: float | None = None) -> tuple[set[str], bool]:
+        # returns the changed paths and whether the tree must be rescanned from scratch
+        paths, rescan = self.read_events(timeout)
+        if not paths and not rescan:
+            return paths, rescan
+        deadline = time.monotonic() + MAX_DELAY
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            more, more_rescan = self.read_events(min(DEBOUNCE, remaining))
+            if not more and not more_rescan:
+                break
+            paths |= more
+            rescan = rescan or more_rescan
+        return paths, rescan
+
+    def close(self) -> None:
+        pass
+
+class InotifyWatcher(Watcher):
+    def __init__(self, directories: list[str], files: list[str]) -> None:
+        super().__init__(directories, files)
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # wd -> (directory, names to report or None for everything below it)
+        self.watches = {}
+        self.add_all()
+
+    def add_watch(self, directory: str, names: set[str] | None) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            # the directory vanished between listing and watching; the next rescan picks it up
+            return
+        if wd in self.watches:
+            # the same directory watched twice: report the union of both filters
+            existing = self.watches[wd][1]
+            names = None if existing is None or names is None else names | existing
+        self.watches[wd] = (directory, names)
+
+    def add_tree(self, root: str) -> None:
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames.sort()
+            self.add_watch(os.path.normpath(dirpath), None)
+
+    def add_all(self) -> None:
+        for wd in list(self.watches):
+            self._rm_watch(self.fd, wd)
+        self.watches = {}
+        for directory in self.directories:
+            self.add_tree(directory)
+        # single files are watched through their directory so atomic saves (rename over) are seen
+        for path in self.files:
+            self.add_watch(os.path.dirname(path) or ".", {os.path.basename(path)})
+
+    def read_events(self, timeout: float | None) -> tuple[set[str], bool]:
+        paths = set()
+        rescan = False
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return paths, rescan
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return paths, rescan
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if wd not in self.watches:
+                continue
+            directory, names = self.watches[wd]
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                rescan = True
+                continue
+            if names is not None and name not in names:
+                continue
+            if mask & IN_ISDIR:
+                # a directory appeared, moved or vanished: its files are not known individually
+                rescan = True
+                continue
+            paths.add(os.path.join(directory, name))
+
+        if rescan:
+            self.add_all()
+        return paths, rescan
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+class PollingWatcher(Watcher):
+    """Fallback for platforms without inotify: compares mtime and size snapshots."""
+
+    def __init__(self, directories: list[str], files: list[str], interval: float = POLL_INTERVAL) -> None:
+        super().__init__(directories, files)
+        self.interval = interval
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        paths = list(self.files)
+        for directory in self.directories:
+            for dirpath, _, filenames in os.walk(directory):
+                paths.extend(os.path.join(dirpath, filename) for filename in filenames)
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[os.path.normpath(path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read_events(self, timeout: float | None) -> tuple[set[str], bool]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self.take_snapshot()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed:
+                return changed, False
+            if deadline is not None and time.monotonic() >= deadline:
+                return set(), False
+            pause = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(pause)
+
+def create_watcher(directories: list[str], files: list[str], polling: bool = False) -> Watcher:
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories, files)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(directories, files)
+
+def watch(builder: 'SiteBuilder', polling: bool = False, watcher: Watcher | None = None) -> None:
+    if watcher is None:
+        watcher = create_watcher([builder.content_dir, builder.static_dir], [builder.template_path], polling)
+    print(f"Watching {builder.content_dir}, {builder.static_dir} and {builder.template_path} "
+          f"({type(watcher).__name__}), press Ctrl-C to stop")
+    failed = False
+    try:
+        while True:
+            paths, rescan = watcher.wait()
+            start = time.perf_counter()
+            try:
+                # after a failed rebuild the builder may be half updated, so the next one starts over
+                builder.rebuild(paths, rescan or failed)
+            except Exception:
+                # a page saved half typed must not end the session; keep watching for the fix
+                traceback.print_exc()
+                print("Rebuild failed, waiting for the next change")
+                failed = True
+                continue
+            failed = False
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()